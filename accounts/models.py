@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from core.cache import ADMIN_SCOPE, invalidate_dashboards
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -10,7 +13,7 @@ class User(AbstractUser):
     
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')
     student_id = models.CharField(max_length=20, blank=True, null=True)
-    department = models.ForeignKey('core.Department', on_delete=models.SET_NULL, null=True, blank=True)
+    department = models.ForeignKey('Department', on_delete=models.SET_NULL, null=True, blank=True)
     
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -33,3 +36,24 @@ class Course(models.Model):
     
     def __str__(self):
         return f"{self.code} - {self.title}"
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Course)
+def directory_changed(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no dashboard shows
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_dashboards([ADMIN_SCOPE])
+
+@receiver(m2m_changed, sender=Course.lecturers.through)
+def course_lecturers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is empty for clear(), so look up who is about to be removed
+        if reverse:
+            lecturer_ids = [instance.pk]
+        else:
+            lecturer_ids = instance.lecturers.values_list('pk', flat=True)
+        invalidate_dashboards(lecturer_ids)
+    elif action in ('post_add', 'post_remove'):
+        invalidate_dashboards([instance.pk] if reverse else pk_set)
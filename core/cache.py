@@ -0,0 +1,119 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+# Safety net for changes that bypass the invalidation signals (queryset
+# update(), raw SQL); every signalled change invalidates immediately
+DASHBOARD_TIMEOUT = 600
+
+# Scope shared by every admin: the admin dashboard shows the same figures to all
+ADMIN_SCOPE = 'admin'
+
+HITS_KEY = 'dashboard:hits'
+MISSES_KEY = 'dashboard:misses'
+
+
+def _version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def _version(scope):
+    """The scope's current data-version stamp, starting a new one if there is none"""
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _count(key):
+    """Add one to a counter; exact where the backend's incr is atomic, as Redis's is"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First count since the cache was cleared; a concurrent add wins
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def dashboard_context(scope, build):
+    """The cached dashboard context of scope (a user id or ADMIN_SCOPE), or build() it.
+
+    Entries are keyed by the scope's data-version stamp, read before
+    building. A change that lands while build() runs bumps the stamp, so
+    the context built from the old data is stored under a key nobody reads.
+    """
+    key = f'dashboard:{scope}:{_version(scope)}'
+    context = cache.get(key)
+    if context is not None:
+        _count(HITS_KEY)
+        return context
+
+    _count(MISSES_KEY)
+    context = build()
+    cache.set(key, context, DASHBOARD_TIMEOUT)
+    return context
+
+
+def invalidate_dashboards(scopes):
+    """Give each scope a new data-version stamp, orphaning its cached dashboard.
+    
+    Runs once the current transaction commits, so a dashboard rebuilt in
+    the meantime cannot be stored under the new stamp with the old data.
+    """
+    scopes = {scope for scope in scopes if scope is not None}
+    if scopes:
+        transaction.on_commit(
+            lambda: cache.set_many({_version_key(scope): uuid.uuid4().hex for scope in scopes}, None)
+        )
+
+
+def dashboard_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 3) if lookups else None,
+    }
+
+
+def table_version(queryset, field='updated_at'):
+    """(row count, latest field) of queryset, a stamp that moves with any insert, delete or save"""
+    stamp = queryset.aggregate(count=Count('pk'), changed=Max(field))
+    return (stamp['count'], stamp['changed'])
+
+
+class VersionedCache:
+    """A value loaded once per process and reloaded when its version stamp moves.
+
+    version() should be cheap, e.g. table_version() of the rows load()
+    reads. It is checked at most every recheck_seconds, which bounds how
+    long changes made by other processes go unseen; invalidate() drops the
+    value at once for changes made in this one.
+    """
+
+    def __init__(self, load, version, recheck_seconds=30):
+        self.load = load
+        self.version = version
+        self.recheck_seconds = recheck_seconds
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        if self._value is None or now - self._checked_at > self.recheck_seconds:
+            version = self.version()
+            if self._value is None or version != self._version:
+                self._value, self._version = self.load(), version
+            self._checked_at = now
+        return self._value
+
+    def invalidate(self):
+        self._value = None
@@ -0,0 +1,20 @@
+from django.db import connection
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500):
+    """Insert objs, updating update_fields on rows that hit unique_fields.
+
+    SQLite and PostgreSQL need the conflict target spelled out, MySQL rejects
+    it and relies on its unique indexes instead.
+    """
+    if not objs:
+        return []
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None
+    return model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
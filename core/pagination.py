@@ -0,0 +1,112 @@
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder keeping times to the microsecond.
+
+    The default encoder cuts them to milliseconds, and a cursor so cut would
+    skip every row sharing the boundary millisecond. The ISO strings decode
+    back through the model field when the cursor is used in a filter.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(',', ':'), cls=CursorEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_filter(ordering, values):
+    """Q matching rows that sort after values under ordering.
+
+    For ordering [a, -b, c] this is a > x | (a = x & b < y) | (a = x & b = y & c > z).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """One page of queryset after cursor, ordered by ordering.
+
+    Works on model and values() querysets. Unlike OFFSET paging, each page
+    costs the same however deep it is, as long as an index matches the
+    ordering. The last field of ordering must be unique (usually 'id') so
+    every row has a distinct position. Raises InvalidCursor for a cursor
+    that was not produced for this ordering.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        names = [field.lstrip('-') for field in ordering]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[name] for name in names])
+        else:
+            next_cursor = encode_cursor([getattr(last, name) for name in names])
+    return KeysetPage(items, next_cursor)
+
+
+def paginate_request(request, queryset, ordering):
+    """keyset_paginate using the request's ?cursor= and ?page_size= parameters"""
+    page_size = request.GET.get('page_size', '')
+    return keyset_paginate(
+        queryset,
+        ordering,
+        cursor=request.GET.get('cursor'),
+        page_size=int(page_size) if page_size.isdigit() else PAGE_SIZE,
+    )
@@ -0,0 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+
+def _setup_worker():
+    django.setup()
+
+
+def process_pool(workers):
+    """ProcessPoolExecutor whose workers set up Django and open their own connections.
+
+    Task functions may live in modules that import models, but not this one:
+    the initializer has to be importable before the app registry is ready.
+    """
+    # Forked children must not share the parent's open database connections
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker)
+
+
+def chunked(items, size):
+    """Split a list into consecutive slices of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,65 @@
+import io
+import json
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Rows fetched per database round trip while streaming
+STREAM_CHUNK_SIZE = 500
+
+# Items encoded into each chunk sent to the client
+ITEMS_PER_CHUNK = 100
+
+
+def stream_json_list(key, items):
+    """Yield the JSON document {key: [items...]} a few items at a time.
+
+    Used with StreamingHttpResponse so a large list is never built in memory
+    as a whole, on the server or as one encoded string.
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    yield f'{{{json.dumps(key)}:['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(encoder.encode(item))
+        if len(chunk) == ITEMS_PER_CHUNK:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']}'
+
+
+class _Drain(io.RawIOBase):
+    """Write-only, unseekable file holding what was written until it is drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(files, compression=zipfile.ZIP_DEFLATED):
+    """Yield a ZIP archive of (name, bytes) pairs as it is written, one file at a time.
+
+    The output is never seeked, so sizes go in data descriptors after each
+    file and only the file being added is held in memory.
+    """
+    output = _Drain()
+    with zipfile.ZipFile(output, 'w', compression=compression) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield output.drain()
+    yield output.drain()
@@ -0,0 +1,195 @@
+import io
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Course, Department
+from feedback.models import Feedback
+from jobs.models import Job
+from results.models import Result
+
+from .cache import VersionedCache
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LecturerDashboardQueryTests(TestCase):
+    """The lecturer dashboard runs a fixed number of queries, however many courses the lecturer has"""
+
+    # Session, user, and five for the dashboard context itself
+    QUERIES = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Computer Science', code='CS')
+        cls.students = [
+            User.objects.create_user(username=f'student{i}', password='x', role='student', department=cls.department)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        # Measure the uncached page; user ids repeat between tests
+        cache.clear()
+
+    def make_lecturer(self, username, course_count):
+        lecturer = User.objects.create_user(username=username, password='x', role='lecturer', department=self.department)
+        for i in range(course_count):
+            course = Course.objects.create(
+                title=f'Course {i}', code=f'{username.upper()}{i}', unit=3, department=self.department
+            )
+            course.lecturers.add(lecturer)
+            for student in self.students:
+                Result.objects.create(student=student, course=course, score=40 + 10 * i, session='2023/2024', semester='1')
+                Feedback.objects.create(
+                    student=student, course=course, lecturer=lecturer, rating=4,
+                    comment='Clear and helpful', session='2023/2024', semester='1',
+                )
+        return lecturer
+
+    def assertDashboardQueries(self, lecturer):
+        self.client.force_login(lecturer)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse('lecturer_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_one_course(self):
+        self.assertDashboardQueries(self.make_lecturer('one', 1))
+
+    def test_many_courses(self):
+        response = self.assertDashboardQueries(self.make_lecturer('many', 8))
+        self.assertEqual(len(response.context['courses']), 8)
+
+    def test_course_student_count_is_distinct(self):
+        lecturer = self.make_lecturer('repeat', 1)
+        course = lecturer.taught_courses.get()
+        # A second term's result for the same student is not a second student
+        Result.objects.create(student=self.students[0], course=course, score=70, session='2024/2025', semester='1')
+        response = self.assertDashboardQueries(lecturer)
+        course = response.context['courses'][0]
+        self.assertEqual(course.student_count, 3)
+        self.assertEqual(course.result_count, 4)
+
+
+class AdminUsersPagingTests(TestCase):
+    """The admin users endpoint pages through every user exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        cls.students = [User.objects.create_user(username=f'u{i}', password='x', role='student') for i in range(5)]
+        # Bulk-imported accounts share a timestamp, down to a sub-millisecond part
+        User.objects.filter(role='student').update(
+            date_joined=timezone.now().replace(microsecond=123456)
+        )
+
+    def page_through(self, **params):
+        self.client.force_login(self.admin)
+        ids = []
+        cursor = None
+        while True:
+            response = self.client.get(
+                reverse('admin_users_data'), {**params, 'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids.extend(user['id'] for user in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_tied_timestamps(self):
+        ids = self.page_through(role='student')
+        self.assertEqual(ids, sorted((student.pk for student in self.students), reverse=True))
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_users_data'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TRANSCRIPT_WORKERS=1)
+class DepartmentTranscriptsTests(TestCase):
+    """The department transcripts ZIP is built by the job worker, not the request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        cls.department = Department.objects.create(name='Computer Science', code='CS')
+        course = Course.objects.create(title='Programming', code='CS101', unit=3, department=cls.department)
+        for i in range(2):
+            student = User.objects.create_user(username=f'student{i}', password='x', role='student', department=cls.department)
+            Result.objects.create(student=student, course=course, score=65, session='2023/2024', semester='1')
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = override_settings(MEDIA_ROOT=media.name)
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.client.force_login(self.admin)
+
+    def test_build_and_download(self):
+        response = self.client.post(reverse('admin_department_transcripts', args=[self.department.pk]))
+        job = Job.objects.get()
+        self.assertRedirects(response, f"{reverse('admin_dashboard')}?transcripts_job={job.pk}")
+        self.assertEqual(job.status, 'pending')
+
+        self.assertTrue(Job.claim_next().run())
+        job.refresh_from_db()
+        self.assertEqual(job.result['transcripts'], 2)
+
+        response = self.client.get(reverse('admin_transcripts_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ['student0.pdf', 'student1.pdf', 'summary.txt'])
+
+    def test_unfinished_job_has_no_download(self):
+        self.client.post(reverse('admin_department_transcripts', args=[self.department.pk]))
+        job = Job.objects.get()
+        response = self.client.get(reverse('admin_transcripts_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_cohort_is_not_queued(self):
+        self.client.post(
+            reverse('admin_department_transcripts', args=[self.department.pk]), {'session': '1999/2000'}
+        )
+        self.assertFalse(Job.objects.exists())
+
+
+class VersionedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.version = 1
+        self.loads = 0
+
+    def make_cache(self, recheck_seconds):
+        def load():
+            self.loads += 1
+            return f'value {self.version}'
+        return VersionedCache(load, lambda: self.version, recheck_seconds)
+
+    def test_reloads_when_version_moves(self):
+        cached = self.make_cache(recheck_seconds=0)
+        self.assertEqual(cached.get(), 'value 1')
+        self.assertEqual(cached.get(), 'value 1')
+        self.assertEqual(self.loads, 1)
+        self.version = 2
+        self.assertEqual(cached.get(), 'value 2')
+        self.assertEqual(self.loads, 2)
+
+    def test_version_is_checked_only_after_recheck_seconds(self):
+        cached = self.make_cache(recheck_seconds=3600)
+        cached.get()
+        self.version = 2
+        self.assertEqual(cached.get(), 'value 1')
+        cached.invalidate()
+        self.assertEqual(cached.get(), 'value 2')
@@ -0,0 +1,430 @@
+"""Transcript PDFs: the data behind them, rendering, a content-addressed disk cache and cohort builds.
+
+A transcript is rendered from plain data (load_transcripts()), so the
+same data can be hashed to name the cached file and sent to worker
+processes. Cached PDFs live in TRANSCRIPT_CACHE_DIR/<student id>/<hash>.pdf;
+a change to a student's results or GPA rows changes the hash, and the
+receivers in results.models also delete the old files. The directory is
+kept under TRANSCRIPT_CACHE_MAX_BYTES by evicting the least recently
+served files. Whole cohorts are rendered by CohortBuild, which bypasses
+the cache.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import zipfile
+from collections import deque
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from results.grading import get_grade_table
+
+from .parallel import chunked, process_pool
+from .streaming import stream_zip
+
+# Part of every cache key; bump it when render_transcript() changes what it draws
+LAYOUT_VERSION = 2
+
+# Lowest CGPA for each classification, best first
+CLASSIFICATIONS = (
+    (3.5, 'First Class'),
+    (2.5, 'Second Class Upper'),
+    (1.5, 'Second Class Lower'),
+    (1.0, 'Third Class'),
+)
+
+# Eviction trims the cache to this fraction of its cap, so it does not run on every write
+TRIM_RATIO = 0.9
+
+# How often a process re-measures the cache, to count files other processes wrote
+RESCAN_SECONDS = 300
+
+
+def classification(cgpa):
+    for lowest, name in CLASSIFICATIONS:
+        if cgpa >= lowest:
+            return name
+    return 'Pass'
+
+
+def load_transcripts(students):
+    """Transcript data for each student, keyed by student id, in two queries.
+
+    students should have their department loaded. The data is plain
+    JSON-compatible values: sessions newest first, each a list of
+    [session, terms], each term [semester, gpa, cgpa, units, points, rows].
+    """
+    from results.models import GPACalculation, Result
+
+    students = list(students)
+    student_ids = [student.pk for student in students]
+    semesters = dict(Result.SEMESTER_CHOICES)
+
+    results = {student_id: {} for student_id in student_ids}
+    rows = Result.objects.filter(student_id__in=student_ids).order_by(
+        'student_id', '-session', '-semester', 'course__code'
+    ).values_list(
+        'student_id', 'session', 'semester', 'course__code', 'course__title', 'course__unit', 'grade', 'grade_point'
+    )
+    for student_id, session, semester, code, title, unit, grade, point in rows:
+        terms = results[student_id].setdefault(session, {})
+        terms.setdefault(semester, []).append([code, title, unit, grade, point])
+
+    gpas = {student_id: {} for student_id in student_ids}
+    latest_cgpa = {}
+    # When the record last changed; printed instead of the render date, so it is part of the hash
+    record_dates = {}
+    rows = GPACalculation.objects.filter(student_id__in=student_ids).order_by(
+        'student_id', '-session', '-semester'
+    ).values_list('student_id', 'session', 'semester', 'gpa', 'cgpa', 'calculated_at')
+    for student_id, session, semester, gpa, cgpa, calculated_at in rows:
+        gpas[student_id][session, semester] = (gpa, cgpa)
+        latest_cgpa.setdefault(student_id, cgpa)
+        calculated_on = timezone.localdate(calculated_at).isoformat()
+        record_dates[student_id] = max(record_dates.get(student_id, calculated_on), calculated_on)
+
+    transcripts = {}
+    for student in students:
+        sessions = []
+        total_units = 0
+        for session, terms in results[student.pk].items():
+            session_terms = []
+            for semester, courses in terms.items():
+                gpa, cgpa = gpas[student.pk].get((session, semester), (0, 0))
+                units = sum(course[2] for course in courses)
+                points = sum(course[4] * course[2] for course in courses)
+                total_units += units
+                session_terms.append([semesters.get(semester, semester), gpa, cgpa, units, points, courses])
+            sessions.append([session, session_terms])
+
+        cgpa = latest_cgpa.get(student.pk, 0)
+        latest_session = sessions[0][0] if sessions else ''
+        transcripts[student.pk] = {
+            'student_id': student.pk,
+            'username': student.username,
+            'name': student.get_full_name() or student.username,
+            'department': student.department.name if student.department else 'Not Assigned',
+            'cgpa': cgpa,
+            'classification': classification(cgpa),
+            'total_units': total_units,
+            'sessions': sessions,
+            'record_date': record_dates.get(student.pk),
+            'grade_scale': [list(row) for row in get_grade_table(student.department_id, latest_session).score_ranges()],
+        }
+    return transcripts
+
+
+def render_transcript(data):
+    """The transcript PDF for data from load_transcripts(), as bytes"""
+    return _render(data)[0]
+
+
+def _render(data):
+    """(PDF bytes, page count) of a transcript"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+
+    # Container for the 'Flowable' objects
+    elements = []
+
+    # Define styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12,
+        textColor=colors.darkblue
+    )
+
+    # Title
+    elements.append(Paragraph("STUDENT MANAGEMENT SYSTEM", title_style))
+    elements.append(Paragraph("OFFICIAL ACADEMIC TRANSCRIPT", title_style))
+    elements.append(Spacer(1, 20))
+
+    # Student Information Table
+    student_info_data = [
+        ['Student Name:', data['name'], 'Student ID:', data['username']],
+        ['Department:', data['department'], 'Current CGPA:', f"{data['cgpa']:.2f}"],
+        ['Total Units:', str(data['total_units']), 'Classification:', data['classification']],
+    ]
+
+    student_info_table = Table(student_info_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
+    student_info_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ]))
+
+    elements.append(student_info_table)
+    elements.append(Spacer(1, 20))
+
+    # Academic Record
+    elements.append(Paragraph("ACADEMIC RECORD", heading_style))
+
+    for session, terms in data['sessions']:
+        elements.append(Paragraph(f"{session} Academic Session", heading_style))
+
+        for semester, semester_gpa, semester_cgpa, total_semester_units, total_semester_points, courses in terms:
+            elements.append(Paragraph(f"{semester} Semester", styles['Heading3']))
+
+            # Create results table
+            table_data = [['Course Code', 'Course Title', 'Units', 'Grade', 'Points']]
+
+            for code, title, unit, grade, grade_point in courses:
+                table_data.append([code, title, str(unit), grade, f"{grade_point:.1f}"])
+
+            # Add semester summary
+            table_data.append([
+                'Semester Summary',
+                f'Units: {total_semester_units}',
+                f'GPA: {semester_gpa:.2f}',
+                f'CGPA: {semester_cgpa:.2f}',
+                f'Points: {total_semester_points:.1f}'
+            ])
+
+            results_table = Table(table_data, colWidths=[1.2*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch])
+            results_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+
+            elements.append(results_table)
+            elements.append(Spacer(1, 15))
+
+    # Grade Scale
+    elements.append(Paragraph("GRADE SCALE", heading_style))
+    grade_scale_data = [['Grade', 'Score Range', 'Points']] + [
+        [grade, score_range, f"{points:.1f}"]
+        for grade, score_range, points in data['grade_scale']
+    ]
+
+    grade_scale_table = Table(grade_scale_data, colWidths=[1*inch, 1.5*inch, 1*inch])
+    grade_scale_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(grade_scale_table)
+    elements.append(Spacer(1, 20))
+
+    # Footer
+    if data['record_date']:
+        record_date = date.fromisoformat(data['record_date'])
+        elements.append(Paragraph(f"Academic record as of {record_date.strftime('%B %d, %Y')}", styles['Normal']))
+
+    doc.build(elements)
+    return buffer.getvalue(), doc.page
+
+
+def render_batch(transcripts):
+    """Worker task: (username, PDF bytes, page count) for each transcript's data"""
+    return [(data['username'], *_render(data)) for data in transcripts]
+
+
+def cohort_students(department, session=None):
+    """A department's students; with a session, only those with results in it"""
+    from django.contrib.auth import get_user_model
+
+    students = get_user_model().objects.filter(role='student', department=department)
+    if session:
+        students = students.filter(result__session=session).distinct()
+    return students
+
+
+def cohort_filename(department, session=None):
+    """Name of a cohort's ZIP archive, e.g. transcripts_CS_2023-2024.zip"""
+    return '_'.join(filter(None, ['transcripts', department.code, (session or '').replace('/', '-')])) + '.zip'
+
+
+def cohort_transcripts(department, session=None):
+    """Transcript data of a department's students, by username, in one prefetched dataset.
+
+    With a session, only students with results in that session are included.
+    """
+    students = list(cohort_students(department, session).select_related('department').order_by('username'))
+    transcripts = load_transcripts(students)
+    return [transcripts[student.pk] for student in students]
+
+
+class CohortBuild:
+    """Renders transcripts in a process pool and streams them as a ZIP archive.
+
+    Chunks of transcript data go to the workers and at most two chunks per
+    worker are in flight, so only their PDFs are ever held in memory. The
+    archive ends with a summary.txt of the counts and pages per second.
+    """
+
+    def __init__(self, transcripts, workers=1, chunk_size=10):
+        self.data = transcripts
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.transcripts = 0
+        self.pages = 0
+        self.started = None
+
+    def rendered(self):
+        """(username, PDF bytes, page count) of each transcript, in order"""
+        chunks = chunked(self.data, self.chunk_size)
+        if self.workers == 1:
+            for chunk in chunks:
+                yield from render_batch(chunk)
+            return
+        with process_pool(self.workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(render_batch, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started if self.started else 0.0
+
+    def pages_per_second(self):
+        elapsed = self.elapsed()
+        return self.pages / elapsed if elapsed else 0.0
+
+    def summary(self):
+        return (
+            f'{self.transcripts} transcripts, {self.pages} pages in {self.elapsed():.1f}s '
+            f'({self.pages_per_second():.1f} pages/s)'
+        )
+
+    def files(self):
+        self.started = time.perf_counter()
+        for username, pdf, pages in self.rendered():
+            self.transcripts += 1
+            self.pages += pages
+            yield f'{username}.pdf', pdf
+        yield 'summary.txt', self.summary().encode() + b'\n'
+
+    def archive(self):
+        """The ZIP archive's bytes, one transcript at a time"""
+        # ReportLab already compresses page streams
+        return stream_zip(self.files(), compression=zipfile.ZIP_STORED)
+
+
+def transcript_etag(data):
+    """Hash of everything a transcript shows; names the cached file and serves as its ETag"""
+    encoded = json.dumps([LAYOUT_VERSION, data], separators=(',', ':'), sort_keys=True).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def cache_dir():
+    return Path(getattr(settings, 'TRANSCRIPT_CACHE_DIR', settings.BASE_DIR / 'transcript_cache'))
+
+
+def _cache_limit():
+    return getattr(settings, 'TRANSCRIPT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+
+# This process's running estimate of the cache size in bytes, and when it was measured
+_cached_bytes = None
+_measured_at = 0.0
+
+
+def _trim(limit):
+    """Measure the cache and, if it is over limit, delete the least recently served files"""
+    files = []
+    for path in cache_dir().glob('*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    if total > limit:
+        files.sort()
+        for _, size, path in files:
+            if total <= limit * TRIM_RATIO:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+    return total
+
+
+def _account(size):
+    global _cached_bytes, _measured_at
+    now = time.monotonic()
+    if _cached_bytes is None or now - _measured_at > RESCAN_SECONDS:
+        _cached_bytes, _measured_at = _trim(_cache_limit()), now
+    else:
+        _cached_bytes += size
+        if _cached_bytes > _cache_limit():
+            _cached_bytes, _measured_at = _trim(_cache_limit()), now
+
+
+def open_transcript(data, etag=None):
+    """A readable file of the transcript PDF, from the cache or rendered into it"""
+    etag = etag or transcript_etag(data)
+    path = cache_dir() / str(data['student_id']) / f'{etag}.pdf'
+    try:
+        handle = open(path, 'rb')
+        # The modification time orders files for eviction
+        os.utime(handle.fileno())
+        return handle
+    except FileNotFoundError:
+        pass
+
+    pdf = render_transcript(data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'{etag}.{os.getpid()}.tmp')
+    temporary.write_bytes(pdf)
+    os.replace(temporary, path)
+    _account(len(pdf))
+    return io.BytesIO(pdf)
+
+
+def invalidate_transcripts(student_ids):
+    """Delete the students' cached transcripts once the current transaction commits"""
+    student_ids = {student_id for student_id in student_ids if student_id is not None}
+    root = cache_dir()
+
+    def delete():
+        for student_id in student_ids:
+            shutil.rmtree(root / str(student_id), ignore_errors=True)
+
+    if student_ids:
+        transaction.on_commit(delete)
@@ -4,6 +4,12 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/users/', views.admin_users_data, name='admin_users_data'),
+    path('admin-dashboard/departments/', views.admin_departments_data, name='admin_departments_data'),
+    path('admin-dashboard/courses/', views.admin_courses_data, name='admin_courses_data'),
+    path('admin-dashboard/cache/', views.dashboard_cache_status, name='dashboard_cache_status'),
+    path('admin-dashboard/departments/<int:department_id>/transcripts/', views.admin_department_transcripts, name='admin_department_transcripts'),
+    path('admin-dashboard/transcripts/<int:job_id>/', views.admin_transcripts_download, name='admin_transcripts_download'),
     path('lecturer-dashboard/', views.lecturer_dashboard, name='lecturer_dashboard'),
     path('student-dashboard/', views.student_dashboard, name='student_dashboard'),
     
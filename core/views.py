@@ -1,22 +1,26 @@
+import os
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse, HttpResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib import messages
-from django.db.models import Avg, Count
-from .models import Department, Course
-from results.models import Result, GPACalculation
+from django.db.models import Avg, Count, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .cache import ADMIN_SCOPE, dashboard_cache_stats, dashboard_context
+from accounts.models import Department, Course
+from .pagination import InvalidCursor, paginate_request
+from .streaming import STREAM_CHUNK_SIZE, stream_json_list
+from .transcripts import cohort_students, load_transcripts, open_transcript, transcript_etag
+from jobs.models import Job
+from results.jobs import enqueue_transcripts
+from results.models import Result, GPACalculation, DepartmentRollup
 from feedback.models import Feedback, FeedbackSummary
-from collections import defaultdict
 from django.utils import timezone
-
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-import io
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
 User = get_user_model()
 
@@ -29,344 +33,328 @@ def admin_dashboard(request):
     if request.user.role != 'admin':
         return redirect('dashboard')
     
-    context = {
-        'total_users': User.objects.count(),
-        'total_students': User.objects.filter(role='student').count(),
-        'total_lecturers': User.objects.filter(role='lecturer').count(),
-        'total_departments': Department.objects.count(),
+    context = dashboard_context(ADMIN_SCOPE, admin_dashboard_context)
+    transcripts_job = request.GET.get('transcripts_job', '')
+    context = {**context, 'transcripts_job': transcripts_job if transcripts_job.isdigit() else None}
+    return render(request, 'core/admin_dashboard.html', context)
+
+def admin_dashboard_context():
+    # Tables are loaded page by page from the admin_*_data endpoints
+    user_counts = User.objects.aggregate(
+        total=Count('id'),
+        students=Count('id', filter=Q(role='student')),
+        lecturers=Count('id', filter=Q(role='lecturer')),
+    )
+    departments = list(Department.objects.only('id', 'name').order_by('name'))
+    return {
+        'total_users': user_counts['total'],
+        'total_students': user_counts['students'],
+        'total_lecturers': user_counts['lecturers'],
+        'total_departments': len(departments),
         'total_courses': Course.objects.count(),
-        'users': User.objects.all().order_by('-date_joined'),
-        'departments': Department.objects.all().order_by('name'),
-        'courses': Course.objects.all().order_by('code'),
-        'lecturers': User.objects.filter(role='lecturer'),
+        'departments': departments,
+        'lecturers': list(User.objects.filter(role='lecturer').only('id', 'username', 'first_name', 'last_name').order_by('username')),
     }
-    return render(request, 'core/admin_dashboard.html', context)
+
+@login_required
+def dashboard_cache_status(request):
+    """AJAX endpoint reporting dashboard cache hits and misses"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return JsonResponse(dashboard_cache_stats())
+
+def keyset_json(request, queryset, ordering, serialize):
+    """JsonResponse with one keyset page of queryset, serialized row by row"""
+    try:
+        page = paginate_request(request, queryset, ordering)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'results': [serialize(item) for item in page],
+        'next_cursor': page.next_cursor,
+    })
+
+@login_required
+def admin_users_data(request):
+    """AJAX endpoint: a page of users, newest first, optionally searched"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    users = User.objects.select_related('department')
+    query = request.GET.get('q', '').strip()
+    if query:
+        users = users.filter(
+            Q(username__icontains=query) | Q(first_name__icontains=query) |
+            Q(last_name__icontains=query) | Q(email__icontains=query)
+        )
+    role = request.GET.get('role', '')
+    if role:
+        users = users.filter(role=role)
+    
+    return keyset_json(request, users, ['-date_joined', '-id'], lambda user: {
+        'id': user.id,
+        'name': user.get_full_name() or user.username,
+        'username': user.username,
+        'email': user.email,
+        'role': user.role,
+        'role_display': user.get_role_display(),
+        'department': user.department.name if user.department else None,
+    })
+
+def rollup_figures(rollup):
+    """JSON figures of a department's term rollup"""
+    if rollup is None:
+        return {'latest_term': None, 'pass_rate': None, 'average_cgpa': None}
+    return {
+        'latest_term': f'{rollup.session} {rollup.get_semester_display()}',
+        'pass_rate': rollup.pass_rate,
+        'average_cgpa': rollup.average_cgpa,
+    }
+
+@login_required
+def admin_departments_data(request):
+    """AJAX endpoint: a page of departments with their counts and latest term rollup"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    departments = Department.objects.all()
+    query = request.GET.get('q', '').strip()
+    if query:
+        departments = departments.filter(Q(name__icontains=query) | Q(code__icontains=query))
+    
+    try:
+        page = paginate_request(request, departments, ['name', 'id'])
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    # Count per page with two grouped queries rather than joining both tables
+    ids = [department.id for department in page]
+    course_counts = dict(
+        Course.objects.filter(department_id__in=ids).order_by()
+        .values_list('department_id').annotate(count=Count('id'))
+    )
+    member_counts = dict(
+        User.objects.filter(department_id__in=ids).order_by()
+        .values_list('department_id').annotate(count=Count('id'))
+    )
+    # Latest term rollup of each department; rollups are ordered newest first
+    latest_rollups = {}
+    for rollup in DepartmentRollup.objects.filter(department_id__in=ids):
+        latest_rollups.setdefault(rollup.department_id, rollup)
+    
+    return JsonResponse({
+        'results': [
+            {
+                'id': department.id,
+                'name': department.name,
+                'code': department.code,
+                'course_count': course_counts.get(department.id, 0),
+                'member_count': member_counts.get(department.id, 0),
+                **rollup_figures(latest_rollups.get(department.id)),
+            }
+            for department in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
+
+@login_required
+def admin_courses_data(request):
+    """AJAX endpoint: a page of courses with their department and lecturers"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    courses = Course.objects.select_related('department').prefetch_related(
+        Prefetch('lecturers', queryset=User.objects.only('id', 'username', 'first_name', 'last_name'))
+    )
+    query = request.GET.get('q', '').strip()
+    if query:
+        courses = courses.filter(Q(code__icontains=query) | Q(title__icontains=query))
+    department_id = request.GET.get('department', '')
+    if department_id.isdigit():
+        courses = courses.filter(department_id=department_id)
+    
+    return keyset_json(request, courses, ['code', 'id'], lambda course: {
+        'id': course.id,
+        'code': course.code,
+        'title': course.title,
+        'unit': course.unit,
+        'department': course.department.name,
+        'lecturers': [lecturer.get_full_name() or lecturer.username for lecturer in course.lecturers.all()],
+    })
 
 @login_required
 def lecturer_dashboard(request):
     if request.user.role != 'lecturer':
         return redirect('dashboard')
     
-    # Get lecturer's courses
-    user_courses = Course.objects.filter(lecturers=request.user)
+    context = dashboard_context(request.user.id, lambda: lecturer_dashboard_context(request.user))
+    return render(request, 'core/lecturer_dashboard.html', context)
+
+def lecturer_dashboard_context(lecturer):
+    # Distinct students per course, as a subquery so the rollup sums are not multiplied by a join
+    student_counts = (
+        Result.objects.filter(course=OuterRef('pk')).order_by().values('course')
+        .annotate(count=Count('student', distinct=True)).values('count')
+    )
+    # Lecturer's courses with result figures summed from their term rollups
+    courses = list(
+        Course.objects.filter(lecturers=lecturer)
+        .annotate(
+            student_count=Coalesce(Subquery(student_counts), 0),
+            result_count=Sum('rollups__result_count'),
+            pass_count=Sum('rollups__pass_count'),
+            score_total=Sum('rollups__score_total'),
+        )
+        .order_by('code')
+    )
     
-    # Get students who have results in lecturer's courses
-    students_with_results = User.objects.filter(
+    # Students who have results in lecturer's courses
+    students_with_results = list(User.objects.filter(
         role='student',
-        result__course__in=user_courses
-    ).distinct()
-    
-    # Get feedback for lecturer's courses
-    lecturer_feedback = Feedback.objects.filter(lecturer=request.user)
-    recent_feedback = lecturer_feedback.order_by('-created_at')[:5]
-    
-    # Calculate statistics
-    total_courses = user_courses.count()
-    total_students = students_with_results.count()
-    total_feedback = lecturer_feedback.count()
-    average_rating = lecturer_feedback.aggregate(avg=Avg('rating'))['avg'] or 0
-    
-    # Sentiment counts
-    positive_feedback = lecturer_feedback.filter(sentiment='positive').count()
-    neutral_feedback = lecturer_feedback.filter(sentiment='neutral').count()
-    negative_feedback = lecturer_feedback.filter(sentiment='negative').count()
-    
-    # Add course statistics
-    courses_with_stats = []
-    for course in user_courses:
-        course_students = User.objects.filter(
-            role='student',
-            result__course=course
-        ).distinct().count()
-        
-        course_feedback = lecturer_feedback.filter(course=course)
-        course_feedback_count = course_feedback.count()
-        course_avg_rating = course_feedback.aggregate(avg=Avg('rating'))['avg'] or 0
-        
-        course.student_count = course_students
-        course.feedback_count = course_feedback_count
-        course.avg_rating = course_avg_rating
-        courses_with_stats.append(course)
+        result__course__lecturers=lecturer
+    ).only('id', 'username', 'first_name', 'last_name').distinct().order_by('username'))
+    
+    # Feedback statistics per course in one grouped query
+    lecturer_feedback = Feedback.objects.filter(lecturer=lecturer)
+    feedback_by_course = {
+        row['course_id']: row
+        for row in lecturer_feedback.order_by().values('course_id').annotate(
+            feedback_count=Count('id'),
+            avg_rating=Avg('rating'),
+            positive=Count('id', filter=Q(sentiment='positive')),
+            neutral=Count('id', filter=Q(sentiment='neutral')),
+            negative=Count('id', filter=Q(sentiment='negative')),
+        )
+    }
+    recent_feedback = list(lecturer_feedback.select_related('course').order_by('-created_at')[:5])
+    
+    # Totals over all of the lecturer's feedback, including past courses
+    rows = feedback_by_course.values()
+    total_feedback = sum(row['feedback_count'] for row in rows)
+    average_rating = (
+        sum(row['avg_rating'] * row['feedback_count'] for row in rows) / total_feedback
+        if total_feedback else 0
+    )
+    
+    for course in courses:
+        course.pass_rate = round(100 * course.pass_count / course.result_count, 1) if course.result_count else 0
+        course.average_score = round(course.score_total / course.result_count, 1) if course.result_count else 0
+        stats = feedback_by_course.get(course.id)
+        course.feedback_count = stats['feedback_count'] if stats else 0
+        course.avg_rating = stats['avg_rating'] if stats else 0
     
     # Get feedback summaries
-    feedback_summaries = FeedbackSummary.objects.filter(
-        lecturer=request.user
-    ).order_by('-session', '-semester')[:6]
+    feedback_summaries = list(FeedbackSummary.objects.filter(
+        lecturer=lecturer
+    ).select_related('course').order_by('-session', '-semester')[:6])
     
-    context = {
-        'courses': courses_with_stats,
+    return {
+        'courses': courses,
         'students': students_with_results,
-        'total_courses': total_courses,
-        'total_students': total_students,
+        'total_courses': len(courses),
+        'total_students': len(students_with_results),
         'total_feedback': total_feedback,
         'average_rating': average_rating,
-        'positive_feedback': positive_feedback,
-        'neutral_feedback': neutral_feedback,
-        'negative_feedback': negative_feedback,
+        'positive_feedback': sum(row['positive'] for row in rows),
+        'neutral_feedback': sum(row['neutral'] for row in rows),
+        'negative_feedback': sum(row['negative'] for row in rows),
         'recent_feedback': recent_feedback,
         'feedback_summaries': feedback_summaries,
     }
-    return render(request, 'core/lecturer_dashboard.html', context)
 
-@login_required
-def student_dashboard(request):
-    if request.user.role != 'student':
-        return redirect('dashboard')
-    
-    # Get student's results
-    student_results = Result.objects.filter(student=request.user).order_by('-session', '-semester', 'course__code')
-    
-    # Get GPA calculations
-    gpa_calculations = GPACalculation.objects.filter(student=request.user).order_by('-session', '-semester')
-    
-    # Calculate statistics
-    total_courses = student_results.values('course').distinct().count()
-    total_units = sum(result.course.unit for result in student_results)
-    
-    # Get current CGPA (latest calculation)
-    current_cgpa = 0
-    if gpa_calculations.exists():
-        current_cgpa = gpa_calculations.first().cgpa
-    
-    # Get feedback given by student
-    feedback_given = Feedback.objects.filter(student=request.user).count()
-    recent_feedback = Feedback.objects.filter(student=request.user).order_by('-created_at')[:4]
-    
-    # Organize results by session and semester
-    results_by_session = defaultdict(lambda: defaultdict(dict))
-    available_sessions = set()
-    
-    for result in student_results:
-        session = result.session
-        semester_display = result.get_semester_display()
-        available_sessions.add(session)
+def student_record(student):
+    """A student's results grouped by session and semester, built in one pass.
+    
+    Runs two queries: results joined to their courses, and the GPA rows,
+    which are indexed by (session, semester). Term units and points are
+    summed while grouping. results_by_session maps session -> semester
+    display -> {'results', 'gpa', 'cgpa', 'total_units', 'total_points'},
+    newest first.
+    """
+    results = Result.objects.filter(student=student).select_related('course').order_by('-session', '-semester', 'course__code')
+    gpa_calculations = list(GPACalculation.objects.filter(student=student).order_by('-session', '-semester'))
+    gpa_by_term = {(calc.session, calc.semester): calc for calc in gpa_calculations}
+    
+    results_by_session = {}
+    courses = set()
+    total_units = 0
+    for result in results:
+        unit = result.course.unit
+        courses.add(result.course_id)
+        total_units += unit
         
-        if semester_display not in results_by_session[session]:
-            # Get GPA data for this session/semester
-            gpa_data = gpa_calculations.filter(session=session, semester=result.semester).first()
-            
-            results_by_session[session][semester_display] = {
+        semesters = results_by_session.setdefault(result.session, {})
+        term = semesters.get(result.get_semester_display())
+        if term is None:
+            gpa_data = gpa_by_term.get((result.session, result.semester))
+            term = semesters[result.get_semester_display()] = {
                 'results': [],
                 'gpa': gpa_data.gpa if gpa_data else 0,
                 'cgpa': gpa_data.cgpa if gpa_data else 0,
                 'total_units': 0,
-                'total_points': 0
+                'total_points': 0,
             }
-        
-        results_by_session[session][semester_display]['results'].append(result)
-    
-    # Calculate totals for each semester
-    for session in results_by_session:
-        for semester in results_by_session[session]:
-            semester_data = results_by_session[session][semester]
-            total_units = sum(r.course.unit for r in semester_data['results'])
-            total_points = sum(r.grade_point * r.course.unit for r in semester_data['results'])
-            
-            semester_data['total_units'] = total_units
-            semester_data['total_points'] = total_points
+        term['results'].append(result)
+        term['total_units'] += unit
+        term['total_points'] += result.grade_point * unit
+    
+    return {
+        'results_by_session': results_by_session,
+        'gpa_calculations': gpa_calculations,
+        'current_cgpa': gpa_calculations[0].cgpa if gpa_calculations else 0,
+        'total_courses': len(courses),
+        'total_units': total_units,
+    }
+
+@login_required
+def student_dashboard(request):
+    if request.user.role != 'student':
+        return redirect('dashboard')
     
-    context = {
+    context = dashboard_context(request.user.id, lambda: student_dashboard_context(request.user))
+    context.update({
         'student': request.user,
-        'total_courses': total_courses,
-        'current_cgpa': current_cgpa,
-        'total_units': total_units,
+        'today': timezone.now().date(),
+    })
+    return render(request, 'core/student_dashboard.html', context)
+
+def student_dashboard_context(student):
+    record = student_record(student)
+    
+    # Get feedback given by student
+    feedback_given = Feedback.objects.filter(student=student).count()
+    recent_feedback = list(Feedback.objects.filter(student=student).select_related('course').order_by('-created_at')[:4])
+    
+    return {
+        'total_courses': record['total_courses'],
+        'current_cgpa': record['current_cgpa'],
+        'total_units': record['total_units'],
         'feedback_given': feedback_given,
-        'semester_gpas': gpa_calculations,
-        'results_by_session': dict(results_by_session),
-        'available_sessions': sorted(available_sessions, reverse=True),
+        'semester_gpas': record['gpa_calculations'],
+        'results_by_session': record['results_by_session'],
+        'available_sessions': sorted(record['results_by_session'], reverse=True),
         'recent_feedback': recent_feedback,
-        'today': timezone.now().date(),
     }
-    return render(request, 'core/student_dashboard.html', context)
 
 @login_required
 def generate_transcript_pdf(request):
-    """Generate and download PDF transcript for student"""
+    """Download the student's PDF transcript, rendered once per version of their record"""
     if request.user.role != 'student':
         return redirect('dashboard')
     
-    # Create the HttpResponse object with PDF headers
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="transcript_{request.user.username}.pdf"'
-    
-    # Create the PDF object
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.darkblue
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        textColor=colors.darkblue
-    )
-    
-    # Get student data
-    student = request.user
-    student_results = Result.objects.filter(student=student).order_by('-session', '-semester', 'course__code')
-    gpa_calculations = GPACalculation.objects.filter(student=student).order_by('-session', '-semester')
-    
-    # Calculate statistics
-    total_units = sum(result.course.unit for result in student_results)
-    current_cgpa = gpa_calculations.first().cgpa if gpa_calculations.exists() else 0
-    
-    # Get classification
-    if current_cgpa >= 3.5:
-        classification = "First Class"
-    elif current_cgpa >= 2.5:
-        classification = "Second Class Upper"
-    elif current_cgpa >= 1.5:
-        classification = "Second Class Lower"
-    elif current_cgpa >= 1.0:
-        classification = "Third Class"
-    else:
-        classification = "Pass"
-    
-    # Title
-    elements.append(Paragraph("STUDENT MANAGEMENT SYSTEM", title_style))
-    elements.append(Paragraph("OFFICIAL ACADEMIC TRANSCRIPT", title_style))
-    elements.append(Spacer(1, 20))
-    
-    # Student Information Table
-    student_info_data = [
-        ['Student Name:', student.get_full_name() or student.username, 'Student ID:', student.username],
-        ['Department:', student.department.name if student.department else 'Not Assigned', 'Current CGPA:', f"{current_cgpa:.2f}"],
-        ['Total Units:', str(total_units), 'Classification:', classification],
-    ]
-    
-    student_info_table = Table(student_info_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
-    student_info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    
-    elements.append(student_info_table)
-    elements.append(Spacer(1, 20))
-    
-    # Academic Record
-    elements.append(Paragraph("ACADEMIC RECORD", heading_style))
-    
-    # Organize results by session and semester
-    results_by_session = defaultdict(lambda: defaultdict(list))
-    for result in student_results:
-        results_by_session[result.session][result.get_semester_display()].append(result)
-    
-    for session in sorted(results_by_session.keys(), reverse=True):
-        elements.append(Paragraph(f"{session} Academic Session", heading_style))
-        
-        for semester in results_by_session[session]:
-            semester_results = results_by_session[session][semester]
-            
-            # Get GPA data for this semester
-            gpa_data = gpa_calculations.filter(
-                session=session, 
-                semester=semester_results[0].semester
-            ).first()
-            
-            semester_gpa = gpa_data.gpa if gpa_data else 0
-            semester_cgpa = gpa_data.cgpa if gpa_data else 0
-            
-            elements.append(Paragraph(f"{semester} Semester", styles['Heading3']))
-            
-            # Create results table
-            table_data = [['Course Code', 'Course Title', 'Units', 'Grade', 'Points']]
-            
-            total_semester_units = 0
-            total_semester_points = 0
-            
-            for result in semester_results:
-                table_data.append([
-                    result.course.code,
-                    result.course.title,
-                    str(result.course.unit),
-                    result.grade,
-                    f"{result.grade_point:.1f}"
-                ])
-                total_semester_units += result.course.unit
-                total_semester_points += result.grade_point * result.course.unit
-            
-            # Add semester summary
-            table_data.append([
-                'Semester Summary',
-                f'Units: {total_semester_units}',
-                f'GPA: {semester_gpa:.2f}',
-                f'CGPA: {semester_cgpa:.2f}',
-                f'Points: {total_semester_points:.1f}'
-            ])
-            
-            results_table = Table(table_data, colWidths=[1.2*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-            results_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(results_table)
-            elements.append(Spacer(1, 15))
-    
-    # Grade Scale
-    elements.append(Paragraph("GRADE SCALE", heading_style))
-    grade_scale_data = [
-        ['Grade', 'Score Range', 'Points'],
-        ['A', '70-100', '4.0'],
-        ['B', '60-69', '3.0'],
-        ['C', '50-59', '2.0'],
-        ['D', '45-49', '1.0'],
-        ['F', '0-44', '0.0']
-    ]
-    
-    grade_scale_table = Table(grade_scale_data, colWidths=[1*inch, 1.5*inch, 1*inch])
-    grade_scale_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(grade_scale_table)
-    elements.append(Spacer(1, 20))
-    
-    # Footer
-    elements.append(Paragraph(f"Generated on {timezone.now().strftime('%B %d, %Y')}", styles['Normal']))
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer and write it to the response
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    
+    data = load_transcripts([request.user])[request.user.id]
+    etag = transcript_etag(data)
+    # A browser that already has this version gets a 304 without the PDF
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is None:
+        response = FileResponse(
+            open_transcript(data, etag),
+            as_attachment=True,
+            filename=f'transcript_{request.user.username}.pdf',
+            content_type='application/pdf',
+        )
+    response['ETag'] = quote_etag(etag)
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 @login_required
@@ -498,6 +486,40 @@ def admin_department_delete(request, department_id):
     
     return redirect('admin_dashboard')
 
+@login_required
+def admin_department_transcripts(request, department_id):
+    """Queue a ZIP of the transcripts of a department's students, optionally of one posted session.
+
+    Large cohorts take longer than a request may, so the job worker renders
+    the archive and the dashboard polls the job for the download.
+    """
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    if request.method != 'POST':
+        return redirect('admin_dashboard')
+    
+    department = get_object_or_404(Department, id=department_id)
+    session = request.POST.get('session', '').strip()
+    if not cohort_students(department, session or None).exists():
+        messages.error(request, f'No {department.name} students to build transcripts for.')
+        return redirect('admin_dashboard')
+    
+    job = enqueue_transcripts(department, session, request.user)
+    messages.info(request, f'{department.name} transcripts queued as job #{job.id}. Progress is shown below.')
+    return redirect(f"{reverse('admin_dashboard')}?transcripts_job={job.id}")
+
+@login_required
+def admin_transcripts_download(request, job_id):
+    """The ZIP archive written by a finished transcripts job"""
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    
+    job = get_object_or_404(Job, id=job_id, handler='results.jobs.build_transcripts', status='done')
+    path = job.result['path']
+    if not default_storage.exists(path):
+        raise Http404('The archive is no longer available')
+    return FileResponse(default_storage.open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
+
 @login_required
 def admin_course_create(request):
     if request.user.role != 'admin':
@@ -564,37 +586,57 @@ def admin_course_delete(request, course_id):
     
     return redirect('admin_dashboard')
 
+# Fields get_course_students can return, selected with ?fields=
+COURSE_STUDENT_FIELDS = {
+    'id': lambda row: row['id'],
+    'name': lambda row: f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+    'username': lambda row: row['username'],
+    'student_id': lambda row: row['student_id'] or '',
+    'result_count': lambda row: row['result_count'],
+}
+
 @login_required
 def get_course_students(request):
-    """AJAX endpoint to get students for a course"""
+    """AJAX endpoint to get students for a course, with their result counts.
+    
+    ?fields=name,username limits each student to those fields (plus id).
+    With ?cursor= or ?page_size= the students come a keyset page at a time;
+    otherwise the whole course is streamed.
+    """
     if request.user.role != 'lecturer':
         return JsonResponse({'students': []})
     
     course_id = request.GET.get('course_id')
-    if course_id:
-        course = get_object_or_404(Course, id=course_id, lecturers=request.user)
-        
-        # Get students who have results in this course
-        students = User.objects.filter(
-            role='student',
-            result__course=course
-        ).distinct()
-        
-        students_data = []
-        for student in students:
-            result_count = Result.objects.filter(
-                student=student,
-                course=course
-            ).count()
-            
-            students_data.append({
-                'id': student.id,
-                'name': student.get_full_name() or student.username,
-                'username': student.username,
-                'student_id': student.student_id or '',
-                'result_count': result_count
-            })
-        
-        return JsonResponse({'students': students_data})
+    if not course_id:
+        return JsonResponse({'students': []})
+    course = get_object_or_404(Course, id=course_id, lecturers=request.user)
+    
+    requested = [field for field in request.GET.get('fields', '').split(',') if field]
+    fields = ['id'] + [field for field in requested if field != 'id'] if requested else list(COURSE_STUDENT_FIELDS)
+    unknown = [field for field in fields if field not in COURSE_STUDENT_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+    
+    # Students who have results in this course, counted in the same query
+    students = User.objects.filter(role='student', result__course=course).values(
+        'id', 'username', 'first_name', 'last_name', 'student_id',
+    ).annotate(result_count=Count('result'))
     
-    return JsonResponse({'students': []})
+    def serialize(row):
+        return {field: COURSE_STUDENT_FIELDS[field](row) for field in fields}
+    
+    if 'cursor' in request.GET or 'page_size' in request.GET:
+        try:
+            page = paginate_request(request, students, ['username', 'id'])
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        return JsonResponse({
+            'students': [serialize(row) for row in page],
+            'next_cursor': page.next_cursor,
+        })
+    
+    rows = students.order_by('username', 'id').iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return StreamingHttpResponse(
+        stream_json_list('students', (serialize(row) for row in rows)),
+        content_type='application/json',
+    )
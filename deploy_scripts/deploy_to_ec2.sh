@@ -29,6 +29,7 @@ export DEBUG=False
 
 # Run migrations
 python manage.py migrate --settings=student_management.settings_production
+python manage.py createcachetable --settings=student_management.settings_production
 
 # Collect static files
 python manage.py collectstatic --noinput --settings=student_management.settings_production
@@ -101,6 +101,7 @@ export $(cat .env | xargs)
 # Run Django setup
 echo "[INFO] Running Django migrations..."
 python manage.py migrate --settings=student_management.settings_production
+python manage.py createcachetable --settings=student_management.settings_production
 
 echo "[INFO] Creating superuser..."
 python manage.py createsuperuser --settings=student_management.settings_production
@@ -1,18 +1,26 @@
 from django.contrib import admin
 from .models import Feedback, FeedbackSummary
+from .search import search_filter
 
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('course', 'lecturer', 'rating', 'sentiment', 'session', 'semester', 'created_at')
     list_filter = ('rating', 'sentiment', 'session', 'semester', 'course__department')
-    search_fields = ('course__code', 'lecturer__username', 'comment')
+    # Comments are searched through the full-text index in get_search_results()
+    search_fields = ('course__code', 'lecturer__username')
     readonly_fields = ('sentiment', 'created_at')
     ordering = ['-created_at']
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(search_filter(search_term, queryset.db))
+        return results, may_have_duplicates
+
 @admin.register(FeedbackSummary)
 class FeedbackSummaryAdmin(admin.ModelAdmin):
     list_display = ('course', 'lecturer', 'session', 'semester', 'total_feedback', 'average_rating')
     list_filter = ('session', 'semester', 'course__department')
     search_fields = ('course__code', 'lecturer__username')
-    readonly_fields = ('last_updated',)
+    readonly_fields = ('rating_total', 'last_updated')
     ordering = ['-session', '-semester']
@@ -0,0 +1,102 @@
+"""Process-local cube of FeedbackSummary counts behind the feedback analytics page"""
+import time
+import uuid
+from collections import defaultdict, namedtuple
+from itertools import product
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Shared stamp bumped whenever a summary changes, so every process rebuilds
+VERSION_KEY = 'feedback:cube:version'
+
+# Rebuild at least this often, to pick up renamed courses and lecturers
+CUBE_MAX_AGE = 300
+
+# Dimensions a query can filter on, in cell order
+DIMENSIONS = ('course_id', 'lecturer_id', 'session', 'semester')
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+
+CubeCell = namedtuple('CubeCell', [
+    *DIMENSIONS, 'course_code', 'course_title', 'lecturer_name', 'semester_display',
+    'total_feedback', 'rating_total', 'average_rating',
+    'positive_count', 'neutral_count', 'negative_count', 'last_updated',
+])
+
+
+class FeedbackCube:
+    """FeedbackSummary rows pre-aggregated for every combination of filters.
+
+    Each summary is added under all 16 keys that wildcard (None) some of
+    its four dimensions, so any filter combination is one dict lookup.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self._totals = defaultdict(lambda: [0, 0, 0, 0, 0])
+        self._cells = defaultdict(list)
+        for cell in cells:
+            values = (cell.total_feedback, cell.rating_total, cell.positive_count, cell.neutral_count, cell.negative_count)
+            for key in product(*((value, None) for value in cell[:len(DIMENSIONS)])):
+                totals = self._totals[key]
+                for index, value in enumerate(values):
+                    totals[index] += value
+                self._cells[key].append(cell)
+        self._totals = dict(self._totals)
+        self._cells = dict(self._cells)
+
+    def totals(self, course_id=None, lecturer_id=None, session=None, semester=None):
+        """Feedback count, weighted average rating and sentiment split for a filter"""
+        total, rating_total, *sentiments = self._totals.get((course_id, lecturer_id, session, semester), [0] * 5)
+        return {
+            'total_feedback': total,
+            'average_rating': round(rating_total / total, 2) if total else 0.0,
+            **dict(zip(SENTIMENTS, sentiments)),
+        }
+
+    def summaries(self, course_id=None, lecturer_id=None, session=None, semester=None):
+        """The summary cells matching a filter, newest term first"""
+        return self._cells.get((course_id, lecturer_id, session, semester), [])
+
+
+_cube = None
+_cube_version = None
+_built_at = 0.0
+
+
+def _build_cube():
+    from .models import FeedbackSummary
+    rows = FeedbackSummary.objects.order_by('-session', '-semester', 'course__code', 'lecturer__username').values_list(
+        'course_id', 'lecturer_id', 'session', 'semester', 'course__code', 'course__title',
+        'lecturer__first_name', 'lecturer__last_name', 'lecturer__username',
+        'total_feedback', 'rating_total', 'average_rating',
+        'positive_count', 'neutral_count', 'negative_count', 'last_updated',
+    )
+    semesters = dict(FeedbackSummary._meta.get_field('semester').choices)
+    cells = []
+    for (course_id, lecturer_id, session, semester, code, title, first_name, last_name, username,
+         total, rating_total, average, positive, neutral, negative, updated) in rows:
+        cells.append(CubeCell(
+            course_id, lecturer_id, session, semester, code, title,
+            f'{first_name} {last_name}'.strip() or username, semesters.get(semester, semester),
+            # Summaries written before rating_total was kept only have the average
+            total, rating_total or round(average * total), average,
+            positive, neutral, negative, updated,
+        ))
+    return FeedbackCube(cells)
+
+
+def feedback_cube():
+    """The cached cube, rebuilt when the shared version stamp moves or it is CUBE_MAX_AGE old"""
+    global _cube, _cube_version, _built_at
+    version = cache.get(VERSION_KEY)
+    now = time.monotonic()
+    if _cube is None or version != _cube_version or now - _built_at > CUBE_MAX_AGE:
+        _cube, _cube_version, _built_at = _build_cube(), version, now
+    return _cube
+
+
+def invalidate_feedback_cube():
+    """Bump the shared version stamp once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
@@ -0,0 +1,264 @@
+"""Pluggable sentiment engines behind Feedback.save() and the batch paths.
+
+settings.SENTIMENT_ENGINE picks the engine: 'keyword' (the default) runs
+feedback.sentiment, 'naive_bayes' a multinomial naive Bayes model trained
+with manage.py train_sentiment and loaded from SENTIMENT_MODEL_PATH. Both
+label whole batches at once, and analyze_comments() memoizes labels by
+comment hash so repeated comments are only scored once per process.
+"""
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from .sentiment import TOKEN_PATTERN, analyze_many
+
+LABELS = ('positive', 'neutral', 'negative')
+
+# Labels remembered per process, oldest dropped first
+MEMO_SIZE = 50_000
+
+# How often get_engine() looks for a retrained model file
+RECHECK_SECONDS = 60
+
+
+class SentimentEngine(ABC):
+    """Labels comments 'positive', 'neutral' or 'negative' given their 1-5 ratings"""
+
+    name = None
+
+    @abstractmethod
+    def analyze_many(self, comments, ratings):
+        """A label for each of the parallel sequences of comments and ratings"""
+
+    def analyze(self, comment, rating):
+        return self.analyze_many([comment], [rating])[0]
+
+
+class KeywordEngine(SentimentEngine):
+    """The keyword heuristic in feedback.sentiment"""
+
+    name = 'keyword'
+
+    def analyze_many(self, comments, ratings):
+        return analyze_many(comments, ratings)
+
+
+def _rating_token(rating):
+    return f'__rating_{rating}'
+
+
+class NaiveBayesEngine(SentimentEngine):
+    """Multinomial naive Bayes over comment words, and optionally the rating.
+
+    Each comment is a bag of TOKEN_PATTERN words; with use_rating its rating
+    is one more token. A batch is scored with one bincount per label.
+    """
+
+    name = 'naive_bayes'
+
+    def __init__(self, vocabulary, labels, log_prior, log_likelihood, use_rating=True):
+        self.vocabulary = {word: index for index, word in enumerate(vocabulary)}
+        self.labels = np.asarray(labels)
+        self.log_prior = np.asarray(log_prior, dtype=float)
+        # One row per vocabulary word, one column per label
+        self.log_likelihood = np.asarray(log_likelihood, dtype=float)
+        self.use_rating = bool(use_rating)
+
+    def tokens(self, comment, rating):
+        words = TOKEN_PATTERN.findall(comment.lower())
+        if self.use_rating:
+            words.append(_rating_token(rating))
+        return words
+
+    @classmethod
+    def train(cls, comments, ratings, labels, alpha=1.0, min_count=2, use_rating=True):
+        """Fit a model to labelled comments, with Laplace smoothing alpha.
+
+        Words seen fewer than min_count times are left out of the vocabulary.
+        """
+        # Comments without text are always neutral, so they teach the model nothing
+        examples = [
+            (comment, rating, label) for comment, rating, label in zip(comments, ratings, labels) if comment
+        ]
+        classes = [label for label in LABELS if label in {example[2] for example in examples}]
+        if not classes:
+            raise ValueError('No labelled comments to train on')
+        documents = []
+        word_counts = Counter()
+        for comment, rating, _ in examples:
+            words = TOKEN_PATTERN.findall(comment.lower())
+            if use_rating:
+                words.append(_rating_token(rating))
+            documents.append(words)
+            word_counts.update(words)
+        vocabulary = sorted(word for word, count in word_counts.items() if count >= min_count)
+        index = {word: position for position, word in enumerate(vocabulary)}
+
+        class_index = {label: position for position, label in enumerate(classes)}
+        columns = [class_index[label] for _, _, label in examples]
+        cells = [
+            index[word] * len(classes) + column
+            for words, column in zip(documents, columns)
+            for word in words if word in index
+        ]
+        counts = np.bincount(cells, minlength=len(vocabulary) * len(classes)).reshape(len(vocabulary), len(classes))
+        priors = np.bincount(columns, minlength=len(classes))
+
+        log_prior = np.log(priors / priors.sum())
+        smoothed = counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=0))
+        return cls(vocabulary, classes, log_prior, log_likelihood, use_rating)
+
+    def analyze_many(self, comments, ratings):
+        comments = list(comments)
+        if not comments:
+            return []
+        vocabulary = self.vocabulary
+        documents = []
+        positions = []
+        for number, (comment, rating) in enumerate(zip(comments, ratings)):
+            if not comment:
+                continue
+            found = [vocabulary[word] for word in self.tokens(comment, rating) if word in vocabulary]
+            documents.extend([number] * len(found))
+            positions.extend(found)
+        documents = np.asarray(documents, dtype=np.intp)
+        positions = np.asarray(positions, dtype=np.intp)
+
+        scores = np.tile(self.log_prior, (len(comments), 1))
+        for column in range(len(self.labels)):
+            scores[:, column] += np.bincount(
+                documents, weights=self.log_likelihood[positions, column], minlength=len(comments),
+            )
+        labels = self.labels[scores.argmax(axis=1)].tolist()
+        # Comments without text are neutral, as with the keyword engine
+        return [label if comment else 'neutral' for comment, label in zip(comments, labels)]
+
+    def save(self, path):
+        """Write the model to path as a .npz file, replacing any previous one atomically"""
+        path = os.fspath(path)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as handle:
+            np.savez(
+                handle,
+                vocabulary=np.array(list(self.vocabulary), dtype=str),
+                labels=self.labels.astype(str),
+                log_prior=self.log_prior,
+                log_likelihood=self.log_likelihood,
+                use_rating=np.array(self.use_rating),
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['vocabulary'].tolist(), data['labels'].tolist(),
+                data['log_prior'], data['log_likelihood'], bool(data['use_rating']),
+            )
+
+
+ENGINES = {
+    KeywordEngine.name: KeywordEngine,
+    NaiveBayesEngine.name: NaiveBayesEngine,
+}
+
+
+def model_path():
+    return getattr(settings, 'SENTIMENT_MODEL_PATH', os.path.join(settings.BASE_DIR, 'sentiment_model.npz'))
+
+
+def _configured():
+    """(engine name, model file modification time) from settings"""
+    name = getattr(settings, 'SENTIMENT_ENGINE', KeywordEngine.name)
+    if name not in ENGINES:
+        raise ValueError(f'Unknown SENTIMENT_ENGINE {name!r}; expected one of {", ".join(ENGINES)}')
+    if name == KeywordEngine.name:
+        return name, None
+    try:
+        return name, os.stat(model_path()).st_mtime_ns
+    except FileNotFoundError:
+        # No model trained yet
+        return KeywordEngine.name, None
+
+
+_engine = None
+_engine_config = None
+_memo = OrderedDict()
+# Request threads share _memo, whose reordering and eviction are not atomic
+_memo_lock = threading.Lock()
+_checked_at = 0.0
+
+
+def get_engine():
+    """The configured engine, reloaded when settings or the model file change"""
+    global _engine, _engine_config, _checked_at
+    now = time.monotonic()
+    if _engine is not None and now - _checked_at < RECHECK_SECONDS:
+        return _engine
+    config = _configured()
+    if config != _engine_config:
+        name = config[0]
+        _engine = NaiveBayesEngine.load(model_path()) if name == NaiveBayesEngine.name else ENGINES[name]()
+        _engine_config = config
+        with _memo_lock:
+            _memo.clear()
+    _checked_at = now
+    return _engine
+
+
+def invalidate_engine():
+    """Reload the engine and forget memoized labels on next use, e.g. after training"""
+    global _engine, _engine_config
+    _engine = _engine_config = None
+    with _memo_lock:
+        _memo.clear()
+
+
+def _memo_key(comment, rating):
+    return hashlib.blake2b(comment.encode(), digest_size=16).digest(), rating
+
+
+def analyze_comments(comments, ratings):
+    """Labels for parallel sequences of comments and ratings from the configured engine.
+
+    Labels already worked out in this process are reused; the rest are
+    scored in one engine call.
+    """
+    engine = get_engine()
+    comments, ratings = list(comments), list(ratings)
+    keys = [_memo_key(comment or '', rating) for comment, rating in zip(comments, ratings)]
+    labels = []
+    missing = {}
+    with _memo_lock:
+        for position, key in enumerate(keys):
+            label = _memo.get(key)
+            if label is None:
+                missing.setdefault(key, []).append(position)
+            else:
+                _memo.move_to_end(key)
+            labels.append(label)
+
+    if missing:
+        # Scored outside the lock, so a large batch does not hold up other requests
+        first = [positions[0] for positions in missing.values()]
+        scored = engine.analyze_many([comments[i] for i in first], [ratings[i] for i in first])
+        for (key, positions), label in zip(missing.items(), scored):
+            for position in positions:
+                labels[position] = label
+        with _memo_lock:
+            _memo.update(zip(missing, scored))
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+    return labels
+
+
+def analyze_comment(comment, rating):
+    """The configured engine's label for one comment"""
+    return analyze_comments([comment], [rating])[0]
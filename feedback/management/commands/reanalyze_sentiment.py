@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import invalidate_dashboards
+from core.parallel import process_pool
+from feedback.models import Feedback, FeedbackSummary
+from feedback.engines import analyze_comments
+
+ROW_FIELDS = ['pk', 'comment', 'rating', 'sentiment', 'student_id', 'course_id', 'lecturer_id', 'session', 'semester']
+
+
+def score_chunk(rows):
+    """Worker task: the rows of a chunk whose stored sentiment is out of date, with their new label"""
+    labels = analyze_comments([row[1] for row in rows], [row[2] for row in rows])
+    return [(row, label) for row, label in zip(rows, labels) if label != row[3]]
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-run sentiment analysis over stored feedback, for example after the '
+        'keyword lists change or a new model is trained. Changed labels are written with bulk_update and '
+        'only the FeedbackSummary rows they belong to are rebuilt.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', help='Only feedback from this session, e.g. 2023/2024')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1, no pool)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Feedback rows per task')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+
+        feedback = Feedback.objects.all()
+        if options['session']:
+            feedback = feedback.filter(session=options['session'])
+        rows = feedback.order_by('pk').values_list(*ROW_FIELDS).iterator(chunk_size=options['chunk_size'])
+        chunks = iter(lambda: list(islice(rows, options['chunk_size'])), [])
+
+        self.scanned = 0
+        self.changed = 0
+        self.summary_keys = set()
+        self.student_ids = set()
+        self.started = time.perf_counter()
+
+        if options['workers'] == 1:
+            for chunk in chunks:
+                self.store(len(chunk), score_chunk(chunk))
+        else:
+            with process_pool(options['workers']) as pool:
+                # Keep a bounded number of chunks in flight so memory stays flat
+                pending = {}
+                for chunk in chunks:
+                    pending[pool.submit(score_chunk, chunk)] = len(chunk)
+                    if len(pending) >= options['workers'] * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self.store(pending.pop(future), future.result())
+                for future in list(pending):
+                    self.store(pending.pop(future), future.result())
+
+        if not self.scanned:
+            self.stdout.write('No feedback matched.')
+            return
+
+        scored = time.perf_counter() - self.started
+        with transaction.atomic():
+            for key in sorted(self.summary_keys):
+                FeedbackSummary.update_summary(*key)
+            # bulk_update() skips the signals that invalidate cached dashboards
+            invalidate_dashboards(self.student_ids)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Relabelled {self.changed} of {self.scanned} feedback rows in {scored:.1f}s '
+            f'({self.scanned / scored:.0f} rows/s) and rebuilt {len(self.summary_keys)} summaries; '
+            f'{elapsed:.1f}s in total.'
+        ))
+
+    def store(self, scanned, changes):
+        if changes:
+            Feedback.objects.bulk_update(
+                [Feedback(pk=row[0], sentiment=label) for row, label in changes],
+                ['sentiment'],
+                batch_size=500,
+            )
+            self.summary_keys.update(tuple(row[5:9]) for row, _ in changes)
+            self.student_ids.update(row[4] for row, _ in changes)
+
+        self.scanned += scanned
+        self.changed += len(changes)
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f'{self.scanned} rows scanned, {self.changed} relabelled ({self.scanned / elapsed:.0f} rows/s)')
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback.engines import KeywordEngine, NaiveBayesEngine, invalidate_engine, model_path
+from feedback.models import Feedback
+
+
+def rating_label(rating):
+    return 'positive' if rating >= 4 else 'negative' if rating <= 2 else 'neutral'
+
+
+def accuracy(predicted, expected):
+    return sum(1 for a, b in zip(predicted, expected) if a == b) / len(expected)
+
+
+class Command(BaseCommand):
+    help = (
+        'Train the naive Bayes sentiment model from stored feedback and save it to '
+        'SENTIMENT_MODEL_PATH. Set SENTIMENT_ENGINE = "naive_bayes" to use it, and '
+        'run reanalyze_sentiment to relabel existing feedback.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--label-source', choices=['stored', 'rating'], default='stored',
+            help='Learn the stored sentiment labels (default), or labels implied by the '
+                 'rating: 4-5 positive, 3 neutral, 1-2 negative. Rating labels leave '
+                 'the rating itself out of the model.',
+        )
+        parser.add_argument('--alpha', type=float, default=1.0, help='Laplace smoothing (default: 1.0)')
+        parser.add_argument('--min-count', type=int, default=2, help='Ignore words seen fewer times (default: 2)')
+        parser.add_argument('--holdout', type=int, default=20, help='Percent of rows kept back to measure accuracy')
+        parser.add_argument('--output', help='Where to write the model (default: SENTIMENT_MODEL_PATH)')
+
+    def handle(self, *args, **options):
+        if options['alpha'] <= 0 or options['min_count'] < 1 or not 0 <= options['holdout'] < 100:
+            raise CommandError('--alpha must be positive, --min-count at least 1 and --holdout 0-99')
+
+        started = time.perf_counter()
+        by_rating = options['label_source'] == 'rating'
+        train, test = ([], [], []), ([], [], [])
+        rows = Feedback.objects.exclude(comment='').order_by('pk').values_list('pk', 'comment', 'rating', 'sentiment')
+        for pk, comment, rating, sentiment in rows.iterator(chunk_size=5000):
+            # A fixed split by primary key, so reruns are comparable
+            comments, ratings, labels = test if pk % 100 < options['holdout'] else train
+            comments.append(comment)
+            ratings.append(rating)
+            labels.append(rating_label(rating) if by_rating else sentiment)
+        if not train[0]:
+            raise CommandError('No feedback with comments to train on')
+
+        try:
+            model = NaiveBayesEngine.train(
+                *train, alpha=options['alpha'], min_count=options['min_count'], use_rating=not by_rating,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        trained = time.perf_counter() - started
+        self.stdout.write(
+            f'Trained on {len(train[0])} comments in {trained:.1f}s: '
+            f'{len(model.vocabulary)} words, labels {", ".join(model.labels.tolist())}.'
+        )
+
+        if test[0]:
+            comments, ratings, labels = test
+            self.stdout.write(
+                f'Holdout accuracy on {len(labels)} comments: '
+                f'{accuracy(model.analyze_many(comments, ratings), labels):.1%} '
+                f'(keyword engine {accuracy(KeywordEngine().analyze_many(comments, ratings), labels):.1%}).'
+            )
+
+        path = options['output'] or model_path()
+        model.save(path)
+        invalidate_engine()
+        self.stdout.write(self.style.SUCCESS(f'Saved the model to {path}.'))
@@ -1,11 +1,26 @@
-from django.db import models
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from accounts.models import Course
+from core.cache import invalidate_dashboards
+from core.db import bulk_upsert
+from results.terms import register_terms
 from django.core.validators import MinValueValidator, MaxValueValidator
-import re
+from .analytics import invalidate_feedback_cube
+from .search import ensure_search_index
+from .engines import analyze_comment
 
 User = get_user_model()
 
+# Summary key fields followed by the values a summary counts
+SUMMARY_STATE_FIELDS = ('course_id', 'lecturer_id', 'session', 'semester', 'rating', 'sentiment')
+
+# Marks a Feedback loaded with deferred fields, whose previous state is unknown
+UNKNOWN_STATE = object()
+
 class Feedback(models.Model):
     RATING_CHOICES = [
         (1, '1 Star - Poor'),
@@ -37,53 +52,57 @@ class Feedback(models.Model):
     class Meta:
         unique_together = ['student', 'course', 'lecturer', 'session', 'semester']
         ordering = ['-created_at']
+        # The unique key leads with student, so lecturer and course lookups
+        # need their own indexes; both end in the default ordering so the
+        # database can read rows in order instead of sorting them
+        indexes = [
+            models.Index(fields=['lecturer', '-created_at'], name='feedback_lecturer_recent_idx'),
+            models.Index(fields=['course', 'lecturer', 'session', 'semester', '-created_at'],
+                         name='feedback_course_term_idx'),
+        ]
     
     def __str__(self):
         return f"Feedback for {self.course.code} by {self.student.username if not self.is_anonymous else 'Anonymous'}"
     
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was stored so save() can apply only the summary delta
+        if instance.get_deferred_fields() & set(SUMMARY_STATE_FIELDS):
+            instance._summary_state = UNKNOWN_STATE
+        else:
+            instance._summary_state = instance.summary_state()
+        return instance
+    
+    def save(self, *args, summarize=True, **kwargs):
+        """Save, analyzing sentiment and adjusting the FeedbackSummary.
+        
+        Pass summarize=False when saving in bulk and call
+        FeedbackSummary.update_summary() for the affected keys afterwards.
+        """
         # Auto-analyze sentiment before saving
         self.sentiment = self.analyze_sentiment()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'comment', 'rating'} & set(update_fields):
+            # update_or_create() only lists the fields in its defaults
+            kwargs['update_fields'] = {*update_fields, 'sentiment'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            previous, self._summary_state = getattr(self, '_summary_state', None), self.summary_state()
+            if not summarize:
+                return
+            if previous is UNKNOWN_STATE:
+                FeedbackSummary.update_summary(*self._summary_state[:4])
+            else:
+                FeedbackSummary.apply_feedback_change(previous, self._summary_state)
+    
+    def summary_state(self):
+        """The fields that decide this feedback's contribution to its summary"""
+        return tuple(getattr(self, field) for field in SUMMARY_STATE_FIELDS)
     
     def analyze_sentiment(self):
-        """Simple sentiment analysis based on keywords"""
-        if not self.comment:
-            return 'neutral'
-        
-        comment_lower = self.comment.lower()
-        
-        # Positive keywords
-        positive_words = [
-            'excellent', 'great', 'good', 'amazing', 'wonderful', 'fantastic', 
-            'outstanding', 'brilliant', 'helpful', 'clear', 'engaging', 'interesting',
-            'knowledgeable', 'patient', 'supportive', 'inspiring', 'effective',
-            'well-organized', 'thorough', 'professional', 'dedicated', 'passionate'
-        ]
-        
-        # Negative keywords
-        negative_words = [
-            'terrible', 'awful', 'bad', 'horrible', 'disappointing', 'confusing',
-            'boring', 'unclear', 'unhelpful', 'disorganized', 'unprofessional',
-            'difficult', 'hard', 'complicated', 'frustrating', 'poor', 'weak',
-            'inadequate', 'insufficient', 'lacking', 'unsatisfactory'
-        ]
-        
-        positive_count = sum(1 for word in positive_words if word in comment_lower)
-        negative_count = sum(1 for word in negative_words if word in comment_lower)
-        
-        # Consider rating in sentiment analysis
-        if self.rating >= 4:
-            positive_count += 1
-        elif self.rating <= 2:
-            negative_count += 1
-        
-        if positive_count > negative_count:
-            return 'positive'
-        elif negative_count > positive_count:
-            return 'negative'
-        else:
-            return 'neutral'
+        """Sentiment label from the configured engine (keywords by default)"""
+        return analyze_comment(self.comment, self.rating)
 
 class FeedbackSummary(models.Model):
     """Summary statistics for feedback"""
@@ -93,6 +112,8 @@ class FeedbackSummary(models.Model):
     semester = models.CharField(max_length=1, choices=[('1', 'First'), ('2', 'Second')])
     
     total_feedback = models.IntegerField(default=0)
+    # Running sum of ratings, so deltas keep average_rating exact
+    rating_total = models.IntegerField(default=0)
     average_rating = models.FloatField(default=0.0)
     positive_count = models.IntegerField(default=0)
     neutral_count = models.IntegerField(default=0)
@@ -100,6 +121,13 @@ class FeedbackSummary(models.Model):
     
     last_updated = models.DateTimeField(auto_now=True)
     
+    SENTIMENT_FIELDS = {
+        'positive': 'positive_count',
+        'neutral': 'neutral_count',
+        'negative': 'negative_count',
+    }
+    TOTAL_FIELDS = ['total_feedback', 'rating_total', 'average_rating', *SENTIMENT_FIELDS.values()]
+    
     class Meta:
         unique_together = ['course', 'lecturer', 'session', 'semester']
         ordering = ['-session', '-semester']
@@ -107,47 +135,147 @@ class FeedbackSummary(models.Model):
     def __str__(self):
         return f"Summary for {self.course.code} - {self.lecturer.get_full_name()}"
     
+    def refresh_average(self):
+        self.average_rating = round(self.rating_total / self.total_feedback, 2) if self.total_feedback else 0.0
+    
     @classmethod
     def update_summary(cls, course, lecturer, session, semester):
-        """Update feedback summary for a course-lecturer combination"""
-        feedback_queryset = Feedback.objects.filter(
-            course=course,
-            lecturer=lecturer,
-            session=session,
-            semester=semester
+        """Recompute the summary of a course-lecturer term from its feedback.
+        
+        course and lecturer may be instances or ids. The counts come from
+        one conditional aggregate and are written with one upsert; the
+        summary is deleted when no feedback is left.
+        """
+        key = {
+            'course_id': getattr(course, 'pk', course),
+            'lecturer_id': getattr(lecturer, 'pk', lecturer),
+            'session': session,
+            'semester': semester,
+        }
+        totals = Feedback.objects.filter(**key).aggregate(
+            total_feedback=models.Count('id'),
+            rating_total=models.Sum('rating'),
+            **{
+                field: models.Count('id', filter=models.Q(sentiment=sentiment))
+                for sentiment, field in cls.SENTIMENT_FIELDS.items()
+            },
         )
         
-        if not feedback_queryset.exists():
+        # Upserts skip the model signals, so invalidate the lecturer's dashboard here
+        invalidate_dashboards([key['lecturer_id']])
+        invalidate_feedback_cube()
+        if not totals['total_feedback']:
             # Delete summary if no feedback exists
-            cls.objects.filter(
-                course=course,
-                lecturer=lecturer,
-                session=session,
-                semester=semester
-            ).delete()
+            cls.objects.filter(**key).delete()
             return None
         
-        total_feedback = feedback_queryset.count()
-        average_rating = feedback_queryset.aggregate(
-            avg_rating=models.Avg('rating')
-        )['avg_rating'] or 0.0
+        summary = cls(**key, **totals)
+        summary.refresh_average()
+        bulk_upsert(
+            cls,
+            [summary],
+            unique_fields=['course', 'lecturer', 'session', 'semester'],
+            update_fields=cls.TOTAL_FIELDS + ['last_updated'],
+        )
+        return summary
+    
+    @classmethod
+    def apply_delta(cls, key, count, rating, sentiments):
+        """Adjust one summary by a change in feedback count, rating sum and sentiment counts.
         
-        positive_count = feedback_queryset.filter(sentiment='positive').count()
-        neutral_count = feedback_queryset.filter(sentiment='neutral').count()
-        negative_count = feedback_queryset.filter(sentiment='negative').count()
+        key is (course_id, lecturer_id, session, semester). The summary row
+        is locked while it changes; a key with no summary yet is computed
+        in full instead.
+        """
+        course_id, lecturer_id, session, semester = key
+        with transaction.atomic():
+            summary = cls.objects.select_for_update().filter(
+                course_id=course_id, lecturer_id=lecturer_id, session=session, semester=semester,
+            ).first()
+            # Ratings start at 1, so a zero rating_total marks a summary
+            # written before the running sum was kept
+            if summary is None or summary.total_feedback and not summary.rating_total:
+                cls.update_summary(*key)
+                return
+            
+            summary.total_feedback += count
+            summary.rating_total += rating
+            for sentiment, change in sentiments.items():
+                field = cls.SENTIMENT_FIELDS[sentiment]
+                setattr(summary, field, getattr(summary, field) + change)
+            if summary.total_feedback <= 0:
+                summary.delete()
+            else:
+                summary.refresh_average()
+                summary.save(update_fields=cls.TOTAL_FIELDS + ['last_updated'])
+    
+    @classmethod
+    def apply_feedback_change(cls, old, new):
+        """Apply the delta between two Feedback.summary_state() values.
         
-        summary, created = cls.objects.update_or_create(
-            course=course,
-            lecturer=lecturer,
-            session=session,
-            semester=semester,
-            defaults={
-                'total_feedback': total_feedback,
-                'average_rating': round(average_rating, 2),
-                'positive_count': positive_count,
-                'neutral_count': neutral_count,
-                'negative_count': negative_count,
-            }
-        )
+        None stands for feedback that did not exist before (insert) or no
+        longer exists (delete).
+        """
+        if old == new:
+            return
         
-        return summary
+        deltas = defaultdict(lambda: [0, 0, defaultdict(int)])
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            *key, rating, sentiment = state
+            delta = deltas[tuple(key)]
+            delta[0] += sign
+            delta[1] += sign * rating
+            delta[2][sentiment] += sign
+        
+        for key, (count, rating, sentiments) in deltas.items():
+            if count or rating or any(sentiments.values()):
+                cls.apply_delta(key, count, rating, sentiments)
+
+@receiver([post_save, post_delete], sender=Feedback)
+def feedback_changed(sender, instance, **kwargs):
+    invalidate_dashboards([instance.student_id, instance.lecturer_id])
+
+@receiver([post_save, post_delete], sender=FeedbackSummary)
+def summary_changed(sender, instance, **kwargs):
+    invalidate_dashboards([instance.lecturer_id])
+    invalidate_feedback_cube()
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, **kwargs):
+    # The analytics cube shows course codes and titles
+    invalidate_feedback_cube()
+
+@receiver(post_save, sender=Feedback)
+def register_feedback_term(sender, instance, **kwargs):
+    register_terms([(instance.session, instance.semester)], 'feedback')
+
+@receiver(post_delete, sender=Feedback)
+def remove_feedback_from_summary(sender, instance, origin=None, **kwargs):
+    # The summary goes with a deleted course or lecturer
+    if isinstance(origin, Course) or getattr(origin, 'model', None) is Course:
+        return
+    if isinstance(origin, User) and origin.pk == instance.lecturer_id:
+        return
+    if getattr(origin, 'model', None) is User:
+        # The batch may include the lecturer, so recompute once it is gone
+        key = (instance.course_id, instance.lecturer_id, instance.session, instance.semester)
+        
+        def recompute():
+            if User.objects.filter(pk=instance.lecturer_id).exists():
+                FeedbackSummary.update_summary(*key)
+        
+        transaction.on_commit(recompute)
+        return
+    previous = getattr(instance, '_summary_state', None)
+    if previous is None or previous is UNKNOWN_STATE:
+        FeedbackSummary.update_summary(instance.course_id, instance.lecturer_id, instance.session, instance.semester)
+    else:
+        FeedbackSummary.apply_feedback_change(previous, None)
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    # There are no migrations to carry the full-text index, so add it after every migrate
+    if sender.label == 'feedback':
+        ensure_search_index(using)
@@ -0,0 +1,200 @@
+"""Full-text search over Feedback.comment.
+
+SQLite uses an FTS5 table kept in sync by triggers, MySQL a FULLTEXT index
+on the comment column, which InnoDB maintains itself. A comment matches
+when it contains any of the query's words, and comments with more and
+rarer matching words rank first. Other databases, and SQLite builds
+without FTS5, fall back to unranked icontains matching.
+"""
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'feedback_feedback_fts'
+FULLTEXT_INDEX = 'feedback_comment_fulltext'
+
+SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        comment, content='feedback_feedback', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON feedback_feedback BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, comment) VALUES (new.id, new.comment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON feedback_feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, comment) VALUES ('delete', old.id, old.comment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF comment ON feedback_feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, comment) VALUES ('delete', old.id, old.comment);
+        INSERT INTO {FTS_TABLE}(rowid, comment) VALUES (new.id, new.comment);
+    END""",
+]
+
+# Database aliases whose search index has been checked: {alias: available}
+_available = {}
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _sqlite_index_exists(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def _mysql_index_exists(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM information_schema.statistics '
+            'WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s',
+            ['feedback_feedback', FULLTEXT_INDEX],
+        )
+        return cursor.fetchone() is not None
+
+
+def ensure_search_index(using='default', rebuild=False):
+    """Create the search index if it is missing; returns whether one is available.
+
+    Runs after every migrate. rebuild=True refills an existing SQLite index
+    from the feedback table.
+    """
+    connection = connections[using]
+    try:
+        if connection.vendor == 'sqlite':
+            created = not _sqlite_index_exists(connection)
+            with connection.cursor() as cursor:
+                for statement in SQLITE_SETUP:
+                    cursor.execute(statement)
+                if created or rebuild:
+                    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'mysql':
+            if not _mysql_index_exists(connection):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE feedback_feedback ADD FULLTEXT INDEX {FULLTEXT_INDEX} (comment)')
+        else:
+            _available[using] = False
+            return False
+    except DatabaseError:
+        # SQLite compiled without FTS5, or no rights to add the index
+        _available[using] = False
+        return False
+    _available[using] = True
+    return True
+
+
+def search_available(using='default'):
+    if using not in _available:
+        connection = connections[using]
+        try:
+            if connection.vendor == 'sqlite':
+                _available[using] = _sqlite_index_exists(connection)
+            elif connection.vendor == 'mysql':
+                _available[using] = _mysql_index_exists(connection)
+            else:
+                _available[using] = False
+        except DatabaseError:
+            _available[using] = False
+    return _available[using]
+
+
+class RankedMatches:
+    """FTS5 matches within a feedback queryset, best first, sliced in SQL.
+
+    Supports count() and slicing, so it can be handed to a Paginator. Each
+    Feedback returned carries its relevance as search_rank.
+    """
+
+    def __init__(self, queryset, match):
+        self.queryset = queryset
+        self.match = match
+
+    def _candidates(self):
+        sql, params = self.queryset.order_by().values('id').query.sql_with_params()
+        return f'rowid IN ({sql})', params
+
+    def count(self):
+        candidates, params = self._candidates()
+        with connections[self.queryset.db].cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND {candidates}',
+                [self.match, *params],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = -1 if index.stop is None else max(index.stop - start, 0)
+        candidates, params = self._candidates()
+        with connections[self.queryset.db].cursor() as cursor:
+            # bm25() is lower for better matches; search_rank is higher-is-better like MySQL's
+            cursor.execute(
+                f'SELECT rowid, -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND {candidates} ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self.match, *params, limit, start],
+            )
+            ranks = dict(cursor.fetchall())
+        rows = self.queryset.in_bulk(list(ranks))
+        items = []
+        for pk, rank in ranks.items():
+            if pk in rows:
+                rows[pk].search_rank = rank
+                items.append(rows[pk])
+        return items
+
+
+def _fts5_match(terms):
+    # Quoted terms are matched literally, so query syntax in them is inert
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+
+def _icontains(terms):
+    condition = Q()
+    for term in terms:
+        condition |= Q(comment__icontains=term)
+    return condition
+
+
+MYSQL_MATCH = 'MATCH (feedback_feedback.comment) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+
+
+def search_feedback(queryset, query):
+    """Feedback in queryset whose comment matches query, best match first.
+
+    Returns a queryset, or on SQLite a RankedMatches; either can be sliced
+    or paginated, and each result has a search_rank.
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+
+    if search_available(queryset.db):
+        vendor = connections[queryset.db].vendor
+        if vendor == 'sqlite':
+            return RankedMatches(queryset, _fts5_match(terms))
+        if vendor == 'mysql':
+            rank = RawSQL(MYSQL_MATCH, [' '.join(terms)], output_field=FloatField())
+            return queryset.annotate(search_rank=rank).filter(search_rank__gt=0).order_by('-search_rank', '-id')
+
+    return queryset.filter(_icontains(terms)).annotate(search_rank=Value(0.0)).order_by('-created_at', '-id')
+
+
+def search_filter(query, using='default'):
+    """Q limiting Feedback to comments matching query, for combining with other lookups"""
+    terms = _terms(query)
+    if not terms:
+        return Q(pk__in=[])
+    if search_available(using):
+        vendor = connections[using].vendor
+        if vendor == 'sqlite':
+            return Q(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts5_match(terms)]))
+        if vendor == 'mysql':
+            return Q(pk__in=RawSQL(f'SELECT id FROM feedback_feedback WHERE {MYSQL_MATCH}', [' '.join(terms)]))
+    return _icontains(terms)
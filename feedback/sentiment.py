@@ -0,0 +1,62 @@
+"""Keyword sentiment analysis shared by Feedback.save() and the batch paths"""
+import re
+
+POSITIVE_WORDS = frozenset({
+    'excellent', 'great', 'good', 'amazing', 'wonderful', 'fantastic',
+    'outstanding', 'brilliant', 'helpful', 'clear', 'engaging', 'interesting',
+    'knowledgeable', 'patient', 'supportive', 'inspiring', 'effective',
+    'well-organized', 'thorough', 'professional', 'dedicated', 'passionate',
+})
+
+NEGATIVE_WORDS = frozenset({
+    'terrible', 'awful', 'bad', 'horrible', 'disappointing', 'confusing',
+    'boring', 'unclear', 'unhelpful', 'disorganized', 'unprofessional',
+    'difficult', 'hard', 'complicated', 'frustrating', 'poor', 'weak',
+    'inadequate', 'insufficient', 'lacking', 'unsatisfactory',
+})
+
+KEYWORDS = POSITIVE_WORDS | NEGATIVE_WORDS
+
+# Words, keeping hyphenated ones whole. Keywords must match whole tokens,
+# so 'goodness' and 'hardware' do not count and 'unclear' is not also
+# read as 'clear'.
+TOKEN_PATTERN = re.compile(r'[a-z]+(?:-[a-z]+)*')
+
+
+def _label(keywords, rating):
+    positive_count = len(keywords & POSITIVE_WORDS)
+    negative_count = len(keywords) - positive_count
+
+    # Consider rating in sentiment analysis
+    if rating >= 4:
+        positive_count += 1
+    elif rating <= 2:
+        negative_count += 1
+
+    if positive_count > negative_count:
+        return 'positive'
+    elif negative_count > positive_count:
+        return 'negative'
+    else:
+        return 'neutral'
+
+
+def sentiment_for(comment, rating):
+    """'positive', 'neutral' or 'negative' for one comment and its 1-5 rating.
+
+    Each distinct keyword counts once; the rating adds a vote when it is
+    4+ (positive) or 2- (negative). Comments without text are neutral.
+    """
+    if not comment:
+        return 'neutral'
+    return _label(KEYWORDS.intersection(TOKEN_PATTERN.findall(comment.lower())), rating)
+
+
+def analyze_many(comments, ratings):
+    """Sentiment labels for parallel sequences of comments and ratings, for imports and backfills"""
+    findall = TOKEN_PATTERN.findall
+    keywords = KEYWORDS.intersection
+    return [
+        _label(keywords(findall(comment.lower())), rating) if comment else 'neutral'
+        for comment, rating in zip(comments, ratings)
+    ]
@@ -0,0 +1,138 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import Course, Department
+from . import engines
+from .engines import KeywordEngine, SentimentEngine, analyze_comments
+from .models import Feedback, FeedbackSummary
+
+User = get_user_model()
+
+
+class SentimentEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        engines.invalidate_engine()
+        self.addCleanup(engines.invalidate_engine)
+
+    def test_engines_must_implement_analyze_many(self):
+        with self.assertRaises(TypeError):
+            SentimentEngine()
+
+    def test_memoized_labels_match_engine(self):
+        comments = ['Clear and helpful', 'Boring and confusing', '', 'Clear and helpful']
+        ratings = [5, 1, 3, 5]
+        expected = KeywordEngine().analyze_many(comments, ratings)
+        self.assertEqual(analyze_comments(comments, ratings), expected)
+        # The second call is answered from the memo
+        self.assertEqual(analyze_comments(comments, ratings), expected)
+
+    def test_concurrent_threads_share_the_memo(self):
+        comments = [f'comment {i} was great' for i in range(200)]
+        ratings = [4] * len(comments)
+        expected = KeywordEngine().analyze_many(comments, ratings)
+        failures = []
+
+        def analyze():
+            for _ in range(20):
+                if analyze_comments(comments, ratings) != expected:
+                    failures.append(True)
+
+        # A small memo, so threads evict each other's labels
+        original, engines.MEMO_SIZE = engines.MEMO_SIZE, 50
+        self.addCleanup(setattr, engines, 'MEMO_SIZE', original)
+        threads = [threading.Thread(target=analyze) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        self.assertLessEqual(len(engines._memo), 50)
+
+
+class SummaryDeltaTests(TestCase):
+    """Summaries kept up to date by deltas equal the summaries recomputed from feedback"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        cls.course = Course.objects.create(title='Programming', code='CS101', unit=3, department=department)
+        cls.lecturer = User.objects.create_user(username='lecturer', password='x', role='lecturer')
+        cls.students = [
+            User.objects.create_user(username=f'student{i}', password='x', role='student', department=department)
+            for i in range(3)
+        ]
+
+    def add_feedback(self, student, rating, comment='', session='2023/2024', semester='1'):
+        return Feedback.objects.create(
+            student=student, course=self.course, lecturer=self.lecturer,
+            rating=rating, comment=comment, session=session, semester=semester,
+        )
+
+    def snapshot(self):
+        return sorted(FeedbackSummary.objects.values_list('session', 'semester', *FeedbackSummary.TOTAL_FIELDS))
+
+    def assertSummariesMatchRecompute(self):
+        stored = self.snapshot()
+        for key in Feedback.objects.values_list('course', 'lecturer', 'session', 'semester').distinct():
+            FeedbackSummary.update_summary(*key)
+        self.assertEqual(stored, self.snapshot())
+
+    def setUp(self):
+        self.feedback = [
+            self.add_feedback(self.students[0], 5, 'Clear and helpful'),
+            self.add_feedback(self.students[1], 2, 'Boring and confusing'),
+        ]
+
+    def test_insert(self):
+        summary = FeedbackSummary.objects.get()
+        self.assertEqual((summary.total_feedback, summary.rating_total, summary.average_rating), (2, 7, 3.5))
+        self.assertEqual((summary.positive_count, summary.negative_count), (1, 1))
+        self.assertSummariesMatchRecompute()
+
+    def test_edit_rating_and_comment(self):
+        feedback = self.feedback[1]
+        feedback.rating = 4
+        feedback.comment = 'Helpful in the end'
+        feedback.save()
+        self.assertEqual(FeedbackSummary.objects.get().positive_count, 2)
+        self.assertSummariesMatchRecompute()
+
+    def test_move_term(self):
+        feedback = self.feedback[0]
+        feedback.semester = '2'
+        feedback.save()
+        self.assertEqual(FeedbackSummary.objects.count(), 2)
+        self.assertSummariesMatchRecompute()
+
+    def test_update_or_create(self):
+        Feedback.objects.update_or_create(
+            student=self.students[0], course=self.course, lecturer=self.lecturer,
+            session='2023/2024', semester='1', defaults={'rating': 1},
+        )
+        self.assertEqual(FeedbackSummary.objects.get().rating_total, 3)
+        self.assertSummariesMatchRecompute()
+
+    def test_deferred_load_falls_back_to_recompute(self):
+        feedback = Feedback.objects.only('pk', 'rating', 'comment').get(pk=self.feedback[0].pk)
+        feedback.rating = 3
+        feedback.save()
+        self.assertSummariesMatchRecompute()
+
+    def test_delete(self):
+        self.feedback[0].delete()
+        self.assertEqual(FeedbackSummary.objects.get().total_feedback, 1)
+        self.feedback[1].delete()
+        self.assertFalse(FeedbackSummary.objects.exists())
+
+    def test_student_deleted(self):
+        self.students[0].delete()
+        self.assertSummariesMatchRecompute()
+
+    def test_summary_without_rating_total_is_recomputed(self):
+        FeedbackSummary.objects.update(rating_total=0)
+        self.add_feedback(self.students[2], 4)
+        self.assertEqual(FeedbackSummary.objects.get().rating_total, 11)
+        self.assertSummariesMatchRecompute()
@@ -2,14 +2,19 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from django.db.models import Q, Avg, Count
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from accounts.models import Course
 from results.models import Result
-from .models import Feedback, FeedbackSummary
+from results.terms import session_choices
+from .analytics import SENTIMENTS, feedback_cube
+from .models import Feedback
+from .search import search_feedback
 
 User = get_user_model()
 
+SEARCH_PAGE_SIZE = 24
+
 @login_required
 def feedback_submission(request):
     """Student feedback submission page"""
@@ -43,7 +48,7 @@ def feedback_submission(request):
                 messages.error(request, 'You can only give feedback for courses you have taken.')
                 return redirect('feedback_submission')
             
-            # Create or update feedback
+            # Create or update feedback; saving it adjusts its FeedbackSummary
             feedback, created = Feedback.objects.update_or_create(
                 student=request.user,
                 course=course,
@@ -56,18 +61,17 @@ def feedback_submission(request):
                 }
             )
             
-            # Update feedback summary
-            FeedbackSummary.update_summary(course, lecturer, session, semester)
-            
             action = 'submitted' if created else 'updated'
             messages.success(request, f'Feedback {action} successfully for {course.code}!')
             
         except Exception as e:
             messages.error(request, f'Error submitting feedback: {str(e)}')
     
-    # Get available sessions and semesters from student's results
-    student_results = Result.objects.filter(student=request.user)
-    sessions = student_results.values_list('session', flat=True).distinct().order_by('-session')
+    # Sessions the student has results in, in registry order
+    student_sessions = set(
+        Result.objects.filter(student=request.user).order_by().values_list('session', flat=True).distinct()
+    )
+    sessions = [session for session in session_choices('results') if session in student_sessions]
     
     context = {
         'courses': student_courses,
@@ -123,17 +127,29 @@ def feedback_management(request):
     if sentiment:
         feedback_queryset = feedback_queryset.filter(sentiment=sentiment)
     
+    # Comment searches are ranked by relevance and paginated
+    query = request.GET.get('q', '').strip()
+    search_page = None
+    if query:
+        results = search_feedback(feedback_queryset.select_related('course', 'lecturer', 'student'), query)
+        search_page = Paginator(results, SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
+    
     context = {
-        'feedback_list': feedback_queryset.order_by('-created_at'),
+        'feedback_list': search_page if query else feedback_queryset.order_by('-created_at'),
+        'search_page': search_page,
+        'page_query': page_query.urlencode(),
         'courses': Course.objects.all() if request.user.role == 'admin' else Course.objects.filter(lecturers=request.user),
         'lecturers': User.objects.filter(role='lecturer') if request.user.role == 'admin' else None,
-        'sessions': Feedback.objects.values_list('session', flat=True).distinct().order_by('-session'),
+        'sessions': session_choices('feedback'),
         'current_filters': {
             'course': course_id,
             'lecturer': lecturer_id,
             'session': session,
             'semester': semester,
             'sentiment': sentiment,
+            'q': query,
         }
     }
     return render(request, 'feedback/feedback_management.html', context)
@@ -144,47 +160,30 @@ def feedback_analytics(request):
     if request.user.role not in ['admin', 'lecturer']:
         return redirect('dashboard')
     
-    # Base queryset for summaries
-    summaries = FeedbackSummary.objects.all()
-    
-    # If lecturer, only show their summaries
-    if request.user.role == 'lecturer':
-        summaries = summaries.filter(lecturer=request.user)
-    
     # Apply filters
     course_id = request.GET.get('course')
     session = request.GET.get('session')
     semester = request.GET.get('semester')
     
-    if course_id:
-        summaries = summaries.filter(course_id=course_id)
-    if session:
-        summaries = summaries.filter(session=session)
-    if semester:
-        summaries = summaries.filter(semester=semester)
-    
-    # Calculate overall statistics
-    total_feedback = summaries.aggregate(
-        total=Count('id')
-    )['total'] or 0
-    
-    average_rating = summaries.aggregate(
-        avg=Avg('average_rating')
-    )['avg'] or 0.0
-    
-    sentiment_totals = summaries.aggregate(
-        positive=Count('id', filter=Q(sentiment='positive')),
-        neutral=Count('id', filter=Q(sentiment='neutral')),
-        negative=Count('id', filter=Q(sentiment='negative'))
-    )
+    # Filters are answered from the in-memory cube of summaries; lecturers only see their own
+    lecturer_id = request.user.id if request.user.role == 'lecturer' else None
+    query = {
+        # A course id that is not a number matches nothing
+        'course_id': (int(course_id) if course_id.isdigit() else course_id) if course_id else None,
+        'lecturer_id': lecturer_id,
+        'session': session or None,
+        'semester': semester or None,
+    }
+    cube = feedback_cube()
+    totals = cube.totals(**query)
     
     context = {
-        'summaries': summaries.order_by('-session', '-semester', 'course__code'),
+        'summaries': cube.summaries(**query),
         'courses': Course.objects.all() if request.user.role == 'admin' else Course.objects.filter(lecturers=request.user),
-        'sessions': FeedbackSummary.objects.values_list('session', flat=True).distinct().order_by('-session'),
-        'total_feedback': total_feedback,
-        'average_rating': round(average_rating, 2),
-        'sentiment_totals': sentiment_totals,
+        'sessions': session_choices('feedback'),
+        'total_feedback': totals['total_feedback'],
+        'average_rating': totals['average_rating'],
+        'sentiment_totals': {sentiment: totals[sentiment] for sentiment in SENTIMENTS},
         'current_filters': {
             'course': course_id,
             'session': session,
@@ -201,16 +200,9 @@ def delete_feedback(request, feedback_id):
     
     if request.method == 'POST':
         feedback = get_object_or_404(Feedback, id=feedback_id)
-        course = feedback.course
-        lecturer = feedback.lecturer
-        session = feedback.session
-        semester = feedback.semester
-        
+        # Deleting the feedback also removes it from its FeedbackSummary
         feedback.delete()
         
-        # Update summary after deletion
-        FeedbackSummary.update_summary(course, lecturer, session, semester)
-        
         messages.success(request, 'Feedback deleted successfully.')
     
     return redirect('feedback_management')
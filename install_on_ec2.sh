@@ -134,6 +134,7 @@ EOF
 print_status "Running Django migrations..."
 export $(cat .env | xargs)
 python manage.py migrate --settings=student_management.settings_production
+python manage.py createcachetable --settings=student_management.settings_production
 
 print_status "Collecting static files..."
 python manage.py collectstatic --settings=student_management.settings_production --noinput
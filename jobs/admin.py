@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'handler', 'status', 'progress', 'total', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'handler')
+    search_fields = ('handler', 'dedupe_key')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    ordering = ['-created_at']
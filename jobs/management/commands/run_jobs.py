@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (GPA recomputation, result ingestion, transcript archives)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=60,
+                            help='Requeue jobs left running for this many minutes by a dead worker')
+
+    def handle(self, *args, **options):
+        requeued = Job.requeue_stale(timezone.now() - timedelta(minutes=options['stale_after']))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s).'))
+
+        while True:
+            job = Job.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            started = time.perf_counter()
+            ok = job.run()
+            elapsed = time.perf_counter() - started
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f'{job} finished in {elapsed:.1f}s'))
+            else:
+                self.stderr.write(self.style.ERROR(f'{job} failed after {elapsed:.1f}s\n{job.error}'))
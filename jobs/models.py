@@ -0,0 +1,132 @@
+import traceback
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+class Job(models.Model):
+    """A unit of background work run by `manage.py run_jobs`"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    # Tries at folding a job into a pending one before queueing it separately
+    MERGE_ATTEMPTS = 3
+    
+    # Dotted path of a function taking the job and returning a JSON-able result
+    handler = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    # Pending jobs sharing a key are merged instead of queued twice
+    dedupe_key = models.CharField(max_length=100, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+    
+    def __str__(self):
+        return f"Job #{self.pk} {self.handler} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, handler, payload=None, dedupe_key='', merge=None, user=None):
+        """Queue a job, or fold it into a pending job with the same dedupe_key.
+        
+        merge(pending_payload, new_payload) returns the combined payload; if
+        it is not given the pending job is returned unchanged.
+        """
+        payload = payload or {}
+        with transaction.atomic():
+            for _ in range(cls.MERGE_ATTEMPTS if dedupe_key else 0):
+                pending = cls.objects.filter(
+                    status='pending',
+                    dedupe_key=dedupe_key
+                ).order_by('created_at').first()
+                if pending is None:
+                    break
+                if not merge:
+                    return pending
+                merged = merge(pending.payload, payload)
+                # select_for_update() is a no-op on SQLite, so write only if no
+                # worker claimed the job and no other merge changed it meanwhile
+                if cls.objects.filter(pk=pending.pk, status='pending', payload=pending.payload).update(payload=merged):
+                    pending.payload = merged
+                    return pending
+            return cls.objects.create(
+                handler=handler,
+                payload=payload,
+                dedupe_key=dedupe_key,
+                created_by=user,
+            )
+    
+    @classmethod
+    def claim_next(cls):
+        """Mark the oldest pending job as running and return it, or None"""
+        candidates = cls.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:10]
+        for pk in candidates:
+            # The conditional update makes claiming safe with several workers
+            claimed = cls.objects.filter(pk=pk, status='pending').update(
+                status='running',
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return cls.objects.get(pk=pk)
+        return None
+    
+    @classmethod
+    def requeue_stale(cls, older_than):
+        """Return running jobs started before older_than (a datetime) to the queue"""
+        return cls.objects.filter(status='running', started_at__lt=older_than).update(status='pending')
+    
+    def run(self):
+        """Run the handler and record its result or error"""
+        try:
+            self.result = import_string(self.handler)(self)
+            self.status = 'done'
+        except Exception:
+            self.error = traceback.format_exc()
+            self.status = 'failed'
+        self.finished_at = timezone.now()
+        self.save(update_fields=['result', 'error', 'status', 'progress', 'total', 'finished_at'])
+        return self.status == 'done'
+    
+    def report_progress(self, progress, total=None):
+        """Store progress without touching the rest of the row"""
+        self.progress = progress
+        if total is not None:
+            self.total = total
+        type(self).objects.filter(pk=self.pk).update(progress=self.progress, total=self.total)
+    
+    def visible_to(self, user):
+        """Admins see every job, others the jobs they queued and those their jobs were merged into"""
+        if user.role == 'admin' or self.created_by_id == user.id:
+            return True
+        return type(self).objects.filter(created_by=user, result__recompute_job=self.pk).exists()
+    
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'handler': self.handler,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'result': self.result,
+            'error': self.error.strip().splitlines()[-1] if self.error else '',
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
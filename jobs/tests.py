@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+
+User = get_user_model()
+
+
+def merge_ids(pending, new):
+    return {'ids': sorted(set(pending['ids']) | set(new['ids']))}
+
+
+def succeed(job):
+    return {'ids': job.payload['ids']}
+
+
+def fail(job):
+    raise ValueError('Nothing to do')
+
+
+class JobQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user(username='first', password='x', role='lecturer')
+        cls.second = User.objects.create_user(username='second', password='x', role='lecturer')
+
+    def enqueue(self, ids, user=None, handler='jobs.tests.succeed'):
+        return Job.enqueue(handler, {'ids': ids}, dedupe_key='test', merge=merge_ids, user=user)
+
+    def test_pending_jobs_are_merged(self):
+        job = self.enqueue([1, 2])
+        merged = self.enqueue([2, 3])
+        self.assertEqual(merged.pk, job.pk)
+        self.assertEqual(Job.objects.get().payload, {'ids': [1, 2, 3]})
+
+    def test_claimed_job_is_not_merged_into(self):
+        job = self.enqueue([1])
+        self.assertEqual(Job.claim_next().pk, job.pk)
+        queued = self.enqueue([2])
+        self.assertNotEqual(queued.pk, job.pk)
+        self.assertEqual(queued.payload, {'ids': [2]})
+
+    def test_claim_takes_oldest_pending_once(self):
+        first = Job.enqueue('jobs.tests.succeed', {'ids': [1]})
+        Job.enqueue('jobs.tests.succeed', {'ids': [2]})
+        claimed = Job.claim_next()
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.attempts), ('running', 1))
+        self.assertNotEqual(Job.claim_next().pk, first.pk)
+        self.assertIsNone(Job.claim_next())
+
+    def test_run_records_result_or_error(self):
+        self.enqueue([1])
+        Job.enqueue('jobs.tests.fail', {'ids': []})
+        self.assertTrue(Job.claim_next().run())
+        self.assertFalse(Job.claim_next().run())
+        done, failed = Job.objects.order_by('created_at')
+        self.assertEqual((done.status, done.result), ('done', {'ids': [1]}))
+        self.assertEqual(failed.status, 'failed')
+        self.assertIn('ValueError: Nothing to do', failed.error)
+
+    def test_stale_jobs_are_requeued(self):
+        job = self.enqueue([1])
+        Job.claim_next()
+        Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(Job.requeue_stale(timezone.now() - timedelta(hours=1)), 1)
+        self.assertEqual(Job.claim_next().attempts, 2)
+
+    def test_status_is_visible_to_creator_and_merged_contributors(self):
+        recompute = self.enqueue([1], user=self.first)
+        # An ingestion job of the second user whose recompute was merged into the first user's
+        Job.objects.create(handler='jobs.tests.succeed', created_by=self.second, status='done',
+                           result={'recompute_job': recompute.pk})
+        outsider = User.objects.create_user(username='outsider', password='x', role='lecturer')
+        for user, status in ((self.first, 200), (self.second, 200), (outsider, 404)):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(reverse('job_status', args=[recompute.pk])).status_code, status)
@@ -0,0 +1,12 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from .models import Job
+
+@login_required
+def job_status(request, job_id):
+    """AJAX endpoint reporting a background job's progress"""
+    job = get_object_or_404(Job, id=job_id)
+    if not job.visible_to(request.user):
+        return JsonResponse({'error': 'Not found'}, status=404)
+    return JsonResponse(job.as_dict())
@@ -1,9 +1,9 @@
-from django.contrib import admin
-from .models import Result, GPACalculation
+from django.contrib import admin, messages
+from .models import Result, GPACalculation, GradingScale, GradeBoundary, CourseRollup, DepartmentRollup, AcademicTerm
 
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
-    list_display = ('student', 'course', 'score', 'grade', 'session', 'semester')
+    list_display = ('student', 'course', 'score', 'grade', 'grade_point', 'session', 'semester')
     list_filter = ('session', 'semester', 'grade', 'course__department')
     search_fields = ('student__username', 'course__code', 'course__title')
     ordering = ['-session', '-semester', 'student__username']
@@ -14,3 +14,54 @@ class GPACalculationAdmin(admin.ModelAdmin):
     list_filter = ('session', 'semester')
     search_fields = ('student__username',)
     ordering = ['-session', '-semester', 'student__username']
+
+@admin.register(AcademicTerm)
+class AcademicTermAdmin(admin.ModelAdmin):
+    list_display = ('session', 'semester', 'sort_key', 'has_results', 'has_feedback', 'updated_at')
+    list_filter = ('has_results', 'has_feedback')
+
+class GradeBoundaryInline(admin.TabularInline):
+    model = GradeBoundary
+    extra = 0
+
+@admin.register(GradingScale)
+class GradingScaleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'department', 'session', 'updated_at')
+    list_filter = ('department',)
+    inlines = [GradeBoundaryInline]
+    actions = ['regrade_results']
+
+    @admin.action(description='Regrade affected results')
+    def regrade_results(self, request, queryset):
+        students = set()
+        for scale in queryset:
+            students.update(scale.regrade(user=request.user))
+        self.message_user(
+            request,
+            f'Regraded results of {len(students)} students; their GPAs are being recalculated.',
+            messages.SUCCESS,
+        )
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are maintained from results; rebuild them with manage.py rebuild_rollups"""
+    list_filter = ('session', 'semester')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(CourseRollup)
+class CourseRollupAdmin(RollupAdmin):
+    list_display = ('course', 'session', 'semester', 'result_count', 'pass_rate', 'average_score', 'updated_at')
+    list_filter = ('session', 'semester', 'course__department')
+    search_fields = ('course__code', 'course__title')
+    list_select_related = ('course',)
+
+@admin.register(DepartmentRollup)
+class DepartmentRollupAdmin(RollupAdmin):
+    list_display = ('department', 'session', 'semester', 'result_count', 'pass_rate', 'student_count',
+                    'average_gpa', 'average_cgpa', 'updated_at')
+    list_filter = ('session', 'semester', 'department')
+    list_select_related = ('department',)
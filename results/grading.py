@@ -0,0 +1,146 @@
+"""Score to grade mapping shared by Result.save() and the bulk paths"""
+from bisect import bisect_right
+from collections import defaultdict
+from types import MappingProxyType
+
+import numpy as np
+
+from core.cache import VersionedCache, table_version
+
+# (lowest score, grade, grade point), in ascending order of score
+DEFAULT_BOUNDARIES = (
+    (0, 'F', 0.0),
+    (45, 'D', 1.0),
+    (50, 'C', 2.0),
+    (60, 'B', 3.0),
+    (70, 'A', 4.0),
+)
+
+
+class GradeTable:
+    """Immutable boundary table mapping scores to grades and grade points.
+    
+    grade_for() serves single rows and grade_many() arrays of scores; both
+    read the same boundaries, so they always agree.
+    """
+    
+    __slots__ = ('boundaries', 'points', '_lows', '_grades', '_low_array', '_grade_array', '_point_array')
+    
+    def __init__(self, boundaries):
+        boundaries = tuple(sorted((float(low), grade, float(points)) for low, grade, points in boundaries))
+        if not boundaries:
+            raise ValueError('A grade table needs at least one boundary')
+        object.__setattr__(self, 'boundaries', boundaries)
+        object.__setattr__(self, 'points', MappingProxyType({grade: points for _, grade, points in boundaries}))
+        object.__setattr__(self, '_lows', tuple(low for low, _, _ in boundaries))
+        object.__setattr__(self, '_grades', tuple(grade for _, grade, _ in boundaries))
+        object.__setattr__(self, '_low_array', np.array(self._lows))
+        object.__setattr__(self, '_grade_array', np.array([grade for _, grade, _ in boundaries]))
+        object.__setattr__(self, '_point_array', np.array([points for _, _, points in boundaries]))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('GradeTable is immutable')
+    
+    def __eq__(self, other):
+        return isinstance(other, GradeTable) and self.boundaries == other.boundaries
+    
+    def __hash__(self):
+        return hash(self.boundaries)
+    
+    def __repr__(self):
+        return f'GradeTable({self.boundaries!r})'
+    
+    def grade_and_point(self, score):
+        """Return (grade, grade point) for one score"""
+        grade = self.grade_for(score)
+        return grade, self.points[grade]
+    
+    def grade_for(self, score):
+        """Return the letter grade for one score"""
+        # Scores below the lowest boundary, and NaN, get the lowest grade
+        if score != score:
+            return self._grades[0]
+        index = bisect_right(self._lows, score) - 1
+        return self._grades[index if index > 0 else 0]
+    
+    def point_for(self, grade):
+        """Return the grade point for a letter grade"""
+        return self.points.get(grade, 0.0)
+    
+    def grade_many(self, scores):
+        """Map an array of scores to (grades, points) arrays with one searchsorted"""
+        scores = np.asarray(scores, dtype=float)
+        index = np.searchsorted(self._low_array, scores, side='right') - 1
+        index = np.where(np.isnan(scores), 0, np.clip(index, 0, None))
+        return self._grade_array[index], self._point_array[index]
+    
+    def score_ranges(self):
+        """(grade, 'low-high', points) rows from the best grade down, for display"""
+        rows = []
+        high = 100
+        for low, grade, points in reversed(self.boundaries):
+            rows.append((grade, f'{low:g}-{high:g}', points))
+            high = low - 1
+        return rows
+
+
+DEFAULT_GRADE_TABLE = GradeTable(DEFAULT_BOUNDARIES)
+
+# Seconds between checks for scales changed by another process
+SCALE_RECHECK_SECONDS = 30
+
+
+def _scale_version():
+    from .models import GradingScale
+    # Boundary edits touch their scale's updated_at, so this covers them too
+    return table_version(GradingScale.objects.all())
+
+
+def _load_tables():
+    from .models import GradingScale
+    tables = {}
+    for scale in GradingScale.objects.prefetch_related('boundaries'):
+        boundaries = [(boundary.min_score, boundary.grade, boundary.points) for boundary in scale.boundaries.all()]
+        if boundaries:
+            tables[(scale.department_id, scale.session)] = GradeTable(boundaries)
+    return MappingProxyType(tables)
+
+
+# Process-wide cache of GradingScale rows: {(department_id, session): GradeTable}
+_tables = VersionedCache(_load_tables, _scale_version, SCALE_RECHECK_SECONDS)
+
+
+def grade_tables():
+    """The cached scale tables, reloaded only when the scale version moves"""
+    return _tables.get()
+
+
+def invalidate_grade_tables():
+    """Drop this process's cached tables; other processes notice within SCALE_RECHECK_SECONDS"""
+    _tables.invalidate()
+
+
+def get_grade_table(department_id=None, session=''):
+    """The most specific scale for a department and session, or the default"""
+    tables = grade_tables()
+    for key in ((department_id, session), (department_id, ''), (None, session), (None, '')):
+        table = tables.get(key)
+        if table is not None:
+            return table
+    return DEFAULT_GRADE_TABLE
+
+
+def grade_many_scaled(keys, scores):
+    """Grade scores whose scale depends on per-row (department_id, session) keys.
+    
+    Rows are grouped by key and each group graded with one grade_many() call.
+    """
+    scores = np.asarray(scores, dtype=float)
+    grades = np.empty(len(scores), dtype='<U1')
+    points = np.empty(len(scores), dtype=float)
+    groups = defaultdict(list)
+    for index, key in enumerate(keys):
+        groups[key].append(index)
+    for (department_id, session), indexes in groups.items():
+        grades[indexes], points[indexes] = get_grade_table(department_id, session).grade_many(scores[indexes])
+    return grades, points
@@ -0,0 +1,240 @@
+import codecs
+import csv
+import itertools
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from accounts.models import Course
+from core.db import bulk_upsert
+from .grading import grade_many_scaled
+from .terms import register_terms
+from .models import Result, GPACalculation, CourseRollup, invalidate_result_dashboards
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+# Rows parsed between progress callbacks
+PROGRESS_EVERY = 1000
+
+# Bytes decoded per step when streaming an upload
+CHUNK_SIZE = 64 * 1024
+
+# Row errors an IngestReport keeps the details of; the rest are only counted
+MAX_ERRORS = 1000
+
+DEFAULT_ENCODING = 'utf-8'
+
+CSV_ENCODINGS = [
+    ('utf-8', 'UTF-8'),
+    ('cp1252', 'Windows-1252 (Excel)'),
+    ('latin-1', 'ISO-8859-1'),
+    ('utf-16', 'UTF-16'),
+]
+
+# UTF-32 LE starts with the UTF-16 LE mark, so it has to be checked first
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+class IngestReport:
+    """Outcome of a bulk ingestion run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.saved = 0
+        self.errors = []  # (line number, message), the first MAX_ERRORS of them
+        self.error_count = 0
+        self.student_ids = []
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def students(self):
+        return len(self.student_ids)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def detect_encoding(head, encoding=None):
+    """Pick a codec for a file from its first bytes.
+
+    A byte order mark always wins; otherwise the requested encoding is used.
+    The returned codec consumes the mark itself.
+    """
+    for bom, codec in BYTE_ORDER_MARKS:
+        if head.startswith(bom):
+            return codec
+    return encoding or DEFAULT_ENCODING
+
+
+def iter_text_lines(uploaded_file, encoding=None, chunk_size=CHUNK_SIZE):
+    """Decode an uploaded file chunk by chunk and yield its lines.
+
+    Only the current chunk and one partial line are held in memory, so peak
+    usage does not grow with the file size. Lines keep their terminators,
+    which lets the csv module handle quoted fields spanning several lines.
+    """
+    chunks = uploaded_file.chunks(chunk_size)
+    head = next(chunks, b'')
+    codec = detect_encoding(head, encoding)
+    decoder = codecs.getincrementaldecoder(codec)()
+
+    pending = ''
+    for chunk in itertools.chain([head], chunks):
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def read_csv_upload(uploaded_file, encoding=None):
+    """Return a csv.DictReader streaming over an uploaded file"""
+    return csv.DictReader(iter_text_lines(uploaded_file, encoding))
+
+
+def parse_rows(rows, report, progress=None):
+    """Yield (line, username, course_code, score) for each valid row.
+
+    Invalid rows are recorded on report instead, and progress, if given, is
+    called with the number of rows read every PROGRESS_EVERY rows.
+    """
+    for line, row in enumerate(rows, start=2):
+        report.rows += 1
+        if progress and report.rows % PROGRESS_EVERY == 0:
+            progress(report.rows)
+        username = (row.get('student_username') or '').strip()
+        course_code = (row.get('course_code') or '').strip()
+        try:
+            score = float(row.get('score', 0))
+        except (TypeError, ValueError):
+            report.add_error(line, f"Invalid score '{row.get('score')}'")
+            continue
+        if not username or not course_code:
+            report.add_error(line, 'Missing student_username or course_code')
+            continue
+        if not 0 <= score <= 100:
+            report.add_error(line, f'Score {score} is outside 0-100')
+            continue
+        yield line, username, course_code, score
+
+
+def batches(items, size):
+    """Split an iterable into lists of at most size items, reading it lazily"""
+    items = iter(items)
+    while batch := list(itertools.islice(items, size)):
+        yield batch
+
+
+def ingest_results(rows, session, semester, user, batch_size=BATCH_SIZE, rebuild_gpa=True, progress=None):
+    """Upsert result rows for one session/semester in bulk.
+
+    rows is an iterable of dicts with student_username, course_code and score
+    keys, typically from read_csv_upload(). Rows are read batch_size at a
+    time: each batch resolves its usernames and course codes with one query
+    apiece and is upserted before the next is read, so memory does not grow
+    with the file. Everything runs in a single transaction, and a repeated
+    row overwrites the earlier one. GPA is recomputed once per affected
+    student rather than once per row. Pass rebuild_gpa=False to leave that
+    to the caller (report.student_ids lists the students), and progress to
+    be called with the number of rows parsed so far.
+    """
+    report = IngestReport()
+    started = time.perf_counter()
+
+    allowed_courses = None
+    if user.role == 'lecturer':
+        allowed_courses = set(Course.objects.filter(lecturers=user).values_list('id', flat=True))
+    # Course codes resolved so far; bounded by the course catalogue, not the file
+    courses = {}
+    affected = set()
+    course_ids = set()
+
+    with transaction.atomic():
+        for batch in batches(parse_rows(rows, report, progress), batch_size):
+            # Keyed so a repeated row wins; a repeat in a later batch is upserted after it
+            parsed = {(username, course_code): (line, score) for line, username, course_code, score in batch}
+            unseen = {code for _, code in parsed} - courses.keys()
+            if unseen:
+                courses.update(
+                    (code, (course_id, department_id))
+                    for code, course_id, department_id in Course.objects.filter(
+                        code__in=unseen
+                    ).values_list('code', 'id', 'department_id')
+                )
+            students = dict(
+                User.objects.filter(
+                    role='student',
+                    username__in={username for username, _ in parsed},
+                ).values_list('username', 'id')
+            )
+
+            to_save = []
+            scales = []
+            for (username, course_code), (line, score) in parsed.items():
+                student_id = students.get(username)
+                course_id, department_id = courses.get(course_code, (None, None))
+                if student_id is None:
+                    report.add_error(line, f"Unknown student '{username}'")
+                    continue
+                if course_id is None:
+                    report.add_error(line, f"Unknown course '{course_code}'")
+                    continue
+                if allowed_courses is not None and course_id not in allowed_courses:
+                    report.add_error(line, f'No permission to upload results for {course_code}')
+                    continue
+                to_save.append(Result(
+                    student_id=student_id,
+                    course_id=course_id,
+                    session=session,
+                    semester=semester,
+                    score=score,
+                ))
+                scales.append((department_id, session))
+
+            # bulk_create() skips Result.save(), so grade the whole batch up front
+            grades, points = grade_many_scaled(scales, [result.score for result in to_save])
+            for result, grade, point in zip(to_save, grades, points):
+                result.grade = str(grade)
+                result.grade_point = float(point)
+            bulk_upsert(
+                Result,
+                to_save,
+                unique_fields=['student', 'course', 'session', 'semester'],
+                update_fields=['score', 'grade', 'grade_point', 'updated_at'],
+                batch_size=batch_size,
+            )
+            report.saved += len(to_save)
+            affected.update(result.student_id for result in to_save)
+            course_ids.update(result.course_id for result in to_save)
+
+        # bulk_create() bypasses Result.save(), so rebuild instead of applying deltas
+        if rebuild_gpa:
+            GPACalculation.rebuild_students(affected)
+        CourseRollup.refresh({(course_id, session, semester) for course_id in course_ids})
+        if report.saved:
+            register_terms([(session, semester)], 'results')
+        # ...and skips the signals that invalidate cached dashboards
+        invalidate_result_dashboards(affected, course_ids)
+
+    report.student_ids = sorted(affected)
+    report.errors.sort()
+    report.elapsed = time.perf_counter() - started
+    return report
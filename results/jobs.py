@@ -0,0 +1,136 @@
+"""Background job handlers for the results app, run by `manage.py run_jobs`"""
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from accounts.models import Department
+from core.parallel import chunked
+from core.transcripts import CohortBuild, cohort_filename, cohort_transcripts
+from jobs.models import Job
+from .ingest import ingest_results, read_csv_upload
+from .models import GPACalculation
+
+User = get_user_model()
+
+# Students rebuilt per grouped query, and between progress reports
+RECOMPUTE_CHUNK = 500
+
+# Per-row errors kept in a finished ingestion job's result
+MAX_STORED_ERRORS = 100
+
+# Transcripts rendered between progress reports of a cohort build
+TRANSCRIPT_PROGRESS_EVERY = 50
+
+
+def merge_student_ids(pending, new):
+    return {'student_ids': sorted(set(pending.get('student_ids', [])) | set(new.get('student_ids', [])))}
+
+
+def enqueue_recompute(student_ids, user=None):
+    """Queue a GPA rebuild; students already waiting are not queued twice"""
+    return Job.enqueue(
+        'results.jobs.recompute_gpa',
+        {'student_ids': sorted(student_ids)},
+        dedupe_key='results.recompute_gpa',
+        merge=merge_student_ids,
+        user=user,
+    )
+
+
+def enqueue_ingest(path, session, semester, encoding, user):
+    """Queue ingestion of a CSV file already saved to default_storage"""
+    return Job.enqueue(
+        'results.jobs.ingest_csv',
+        {'path': path, 'session': session, 'semester': semester, 'encoding': encoding},
+        user=user,
+    )
+
+
+def enqueue_transcripts(department, session, user):
+    """Queue a build of a department's transcripts ZIP; a build of the same cohort still waiting is reused"""
+    return Job.enqueue(
+        'results.jobs.build_transcripts',
+        {'department_id': department.pk, 'session': session},
+        dedupe_key=f'results.build_transcripts:{department.pk}:{session}',
+        user=user,
+    )
+
+
+def recompute_gpa(job):
+    student_ids = job.payload.get('student_ids', [])
+    job.report_progress(0, len(student_ids))
+    done = 0
+    rows = 0
+    for chunk in chunked(student_ids, RECOMPUTE_CHUNK):
+        rows += len(GPACalculation.rebuild_students(chunk))
+        done += len(chunk)
+        job.report_progress(done)
+    return {'students': done, 'term_rows': rows}
+
+
+def ingest_csv(job):
+    payload = job.payload
+    try:
+        with default_storage.open(payload['path'], 'rb') as csv_file:
+            try:
+                report = ingest_results(
+                    read_csv_upload(csv_file, payload['encoding']),
+                    payload['session'],
+                    payload['semester'],
+                    job.created_by,
+                    rebuild_gpa=False,
+                    progress=job.report_progress,
+                )
+            except UnicodeDecodeError:
+                raise ValueError(
+                    f"Could not read the file as {payload['encoding']}. "
+                    f"Select the encoding it was saved with and upload it again."
+                )
+    finally:
+        default_storage.delete(payload['path'])
+
+    job.progress = report.rows
+    recompute = enqueue_recompute(report.student_ids, user=job.created_by) if report.student_ids else None
+    return {
+        'rows': report.rows,
+        'saved': report.saved,
+        'students': report.students,
+        'error_count': report.error_count,
+        'errors': report.errors[:MAX_STORED_ERRORS],
+        'rows_per_second': round(report.rows_per_second),
+        'recompute_job': recompute.pk if recompute else None,
+    }
+
+
+def build_transcripts(job):
+    """Render a cohort's transcripts into a ZIP archive in default_storage.
+
+    The archive is spooled to a temporary file and then saved under
+    transcripts/, replacing the previous build of the same cohort.
+    """
+    payload = job.payload
+    department = Department.objects.get(pk=payload['department_id'])
+    session = payload['session'] or None
+    transcripts = cohort_transcripts(department, session)
+    job.report_progress(0, len(transcripts))
+
+    build = CohortBuild(transcripts, workers=getattr(settings, 'TRANSCRIPT_WORKERS', 1))
+    with tempfile.TemporaryFile() as archive:
+        for data in build.archive():
+            archive.write(data)
+            if build.transcripts - job.progress >= TRANSCRIPT_PROGRESS_EVERY:
+                job.report_progress(build.transcripts)
+        name = f'transcripts/{cohort_filename(department, session)}'
+        default_storage.delete(name)
+        path = default_storage.save(name, File(archive))
+
+    job.progress = build.transcripts
+    return {
+        'path': path,
+        'transcripts': build.transcripts,
+        'pages': build.pages,
+        'summary': build.summary(),
+    }
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Department
+from core.transcripts import CohortBuild, cohort_filename, cohort_transcripts
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the transcripts of a department's students into one ZIP file. "
+        'The data is loaded up front, the PDFs are rendered in a process pool '
+        'and written to the archive as they arrive.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', required=True, help='Department code')
+        parser.add_argument('--session', help='Only students with results in this session, e.g. 2023/2024')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1, no pool)')
+        parser.add_argument('--chunk-size', type=int, default=10, help='Transcripts per task')
+        parser.add_argument('--output', help='ZIP file to write (default: transcripts_<department>[_<session>].zip)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+        try:
+            department = Department.objects.get(code=options['department'])
+        except Department.DoesNotExist:
+            raise CommandError(f"Unknown department: {options['department']}")
+
+        started = time.perf_counter()
+        transcripts = cohort_transcripts(department, options['session'])
+        if not transcripts:
+            self.stdout.write('No students matched.')
+            return
+        self.stdout.write(f'Loaded {len(transcripts)} transcripts in {time.perf_counter() - started:.1f}s.')
+
+        output = options['output'] or cohort_filename(department, options['session'])
+        build = CohortBuild(transcripts, workers=options['workers'], chunk_size=options['chunk_size'])
+        reported = 0
+        with open(output, 'wb') as archive:
+            for data in build.archive():
+                archive.write(data)
+                if build.transcripts - reported >= 100:
+                    reported = build.transcripts
+                    self.stdout.write(f'{build.transcripts} of {len(transcripts)} rendered ({build.pages_per_second():.1f} pages/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {build.summary()} to {output}.'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from results.models import CourseRollup, DepartmentRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the course and department rollup tables from results and GPA '
+        'rows. Saves keep them current; run this after loading data in bulk or '
+        'after first creating the tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', help='Only rollups of this session, e.g. 2023/2024')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        courses = CourseRollup.rebuild(options['session'])
+        departments = DepartmentRollup.rebuild(options['session'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {courses} course and {departments} department term rollups '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Department
+from core.parallel import chunked, process_pool
+from results.models import Result, GPACalculation
+
+ROW_FIELDS = ['session', 'semester'] + GPACalculation.TOTAL_FIELDS
+
+
+def compute_chunk(student_ids):
+    """Worker task: compute term rows for a chunk of students as plain tuples"""
+    rows_by_student = GPACalculation.compute_terms_for(student_ids)
+    return student_ids, {
+        student_id: [tuple(getattr(row, field) for field in ROW_FIELDS) for row in rows]
+        for student_id, rows in rows_by_student.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild GPACalculation rows from results. Filters choose which students '
+        'are rebuilt; every term of a chosen student is rewritten because later '
+        'CGPAs depend on earlier terms.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', help='Only students with results in this session, e.g. 2023/2024')
+        parser.add_argument('--semester', choices=[choice for choice, _ in Result.SEMESTER_CHOICES],
+                            help='Only students with results in this semester')
+        parser.add_argument('--department', help="Only students in this department (department code)")
+        parser.add_argument('--regrade', action='store_true',
+                            help='Recompute stored grades from scores for the matched results first')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1, no pool)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Students per task')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+
+        results = Result.objects.all()
+        if options['session']:
+            results = results.filter(session=options['session'])
+        if options['semester']:
+            results = results.filter(semester=options['semester'])
+        if options['department']:
+            try:
+                department = Department.objects.get(code=options['department'])
+            except Department.DoesNotExist:
+                raise CommandError(f"Unknown department: {options['department']}")
+            results = results.filter(student__department=department)
+
+        if options['regrade']:
+            started = time.perf_counter()
+            regraded = results.regrade()
+            self.stdout.write(f'Regraded results of {len(regraded)} students in {time.perf_counter() - started:.1f}s.')
+
+        student_ids = sorted(set(results.order_by().values_list('student_id', flat=True).distinct()))
+        if not student_ids:
+            self.stdout.write('No students matched.')
+            return
+
+        self.total = len(student_ids)
+        self.done = 0
+        self.written = 0
+        self.started = time.perf_counter()
+        chunks = list(chunked(student_ids, options['chunk_size']))
+
+        if options['workers'] == 1:
+            for chunk in chunks:
+                self.store(*compute_chunk(chunk))
+        else:
+            with process_pool(options['workers']) as pool:
+                futures = [pool.submit(compute_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    self.store(*future.result())
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {self.written} term rows for {self.total} students in {elapsed:.1f}s '
+            f'({self.total / elapsed:.0f} students/s, {self.written / elapsed:.0f} rows/s).'
+        ))
+
+    def store(self, student_ids, computed):
+        rows_by_student = {
+            student_id: [
+                GPACalculation(student_id=student_id, **dict(zip(ROW_FIELDS, values)))
+                for values in rows
+            ]
+            for student_id, rows in computed.items()
+        }
+        rows = GPACalculation.store_terms(student_ids, rows_by_student)
+
+        self.done += len(student_ids)
+        self.written += len(rows)
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'{self.done}/{self.total} students, {self.written} term rows '
+            f'({self.done / elapsed:.0f} students/s)'
+        )
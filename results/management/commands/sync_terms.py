@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from results.models import AcademicTerm
+
+
+class Command(BaseCommand):
+    help = (
+        'Register every session and semester found in results and feedback in '
+        'the AcademicTerm table behind the filter dropdowns. Saves keep it '
+        'current; run this once after creating the table.'
+    )
+
+    def handle(self, *args, **options):
+        count = AcademicTerm.sync()
+        self.stdout.write(self.style.SUCCESS(f'{count} academic terms registered.'))
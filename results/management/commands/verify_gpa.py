@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from results.models import GPACalculation
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Check stored GPA running totals against a full recompute from results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', action='append', help='Username to check (repeatable); defaults to everyone')
+        parser.add_argument('--repair', action='store_true', help='Rebuild the GPA rows of students with mismatches')
+
+    def handle(self, *args, **options):
+        students = None
+        if options['student']:
+            students = list(User.objects.filter(username__in=options['student'], role='student'))
+            if len(students) != len(set(options['student'])):
+                found = {student.username for student in students}
+                missing = ', '.join(sorted(set(options['student']) - found))
+                raise CommandError(f'Unknown student(s): {missing}')
+
+        mismatches = GPACalculation.verify(students, repair=options['repair'])
+        for student_id, session, semester, field, stored, expected in mismatches:
+            self.stdout.write(
+                f'student {student_id} {session}/{semester} {field}: stored {stored}, expected {expected}'
+            )
+
+        affected = len({mismatch[0] for mismatch in mismatches})
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All GPA totals match their results.'))
+        elif options['repair']:
+            self.stdout.write(self.style.WARNING(f'Repaired {affected} student(s) with {len(mismatches)} mismatch(es).'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{affected} student(s) with {len(mismatches)} mismatch(es); rerun with --repair to fix.'))
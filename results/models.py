@@ -1,10 +1,120 @@
-from django.db import models
+import re
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import NullIf, Round
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from accounts.models import Course
+from django.utils import timezone
+from accounts.models import Course, Department
+from core.cache import invalidate_dashboards
+from core.db import bulk_upsert
+from core.parallel import chunked
+from core.transcripts import invalidate_transcripts
+from .grading import get_grade_table, grade_many_scaled, invalidate_grade_tables
+from .terms import invalidate_terms, register_terms
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
+# Marks a Result loaded with deferred fields, whose previous state is unknown
+UNKNOWN_STATE = object()
+
+# Students rebuilt per grouped query when a course's unit changes
+GPA_REBUILD_CHUNK = 500
+
+class ResultQuerySet(models.QuerySet):
+    """Grade-point aggregation done by the database.
+    
+    Each result stores the grade point its scale gave it, weighted here by
+    Course.unit through a join, so totals for any number of students cost a
+    single query.
+    """
+    
+    def with_points(self):
+        """Annotate each result with its course unit and weighted points"""
+        return self.annotate(
+            unit=F('course__unit'),
+            points=F('grade_point') * F('course__unit'),
+        )
+    
+    def _totals(self, *group_by):
+        return self.order_by().values(*group_by).annotate(
+            total_units=Sum('course__unit'),
+            total_points=Sum(F('grade_point') * F('course__unit')),
+        ).annotate(
+            gpa=Round(F('total_points') / NullIf(F('total_units'), 0), 2),
+        )
+    
+    def gpa_by_term(self):
+        """One row per student and term with total_units, total_points and gpa"""
+        return self._totals('student', 'session', 'semester')
+    
+    def gpa_by_student(self):
+        """One row per student with total_units, total_points and gpa.
+        
+        Over a student's whole record the gpa column is their CGPA; filter
+        by session and semester first to get a term GPA instead.
+        """
+        return self._totals('student')
+    
+    def regrade(self, batch_size=2000):
+        """Recompute stored grades from scores in bulk, returning the student ids changed.
+        
+        Scores are graded a batch at a time against their department's and
+        session's scale and only rows whose grade or point changed are
+        written. The affected course rollups are refreshed, but this
+        bypasses Result.save(), so callers must rebuild GPA for the returned
+        students.
+        """
+        changed_students = set()
+        changed_terms = set()
+        last_pk = 0
+        while True:
+            # Walk the queryset in primary-key order so memory stays bounded
+            batch = list(
+                self.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'student_id', 'score', 'grade', 'grade_point', 'course_id', 'semester',
+                    'course__department_id', 'session',
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            
+            grades, points = grade_many_scaled(
+                [(department_id, session) for *_, department_id, session in batch],
+                [row[2] for row in batch],
+            )
+            changed = [
+                (row, Result(pk=row[0], student_id=row[1], grade=str(grade), grade_point=float(point)))
+                for row, grade, point in zip(batch, grades, points)
+                if (grade, point) != (row[3], row[4])
+            ]
+            if changed:
+                Result.objects.bulk_update([result for _, result in changed], ['grade', 'grade_point'])
+                changed_students.update(result.student_id for _, result in changed)
+                changed_terms.update((row[5], row[8], row[6]) for row, _ in changed)
+        CourseRollup.refresh(changed_terms)
+        return changed_students
+    
+    def totals(self):
+        """Aggregate total_units, total_points and gpa over the queryset"""
+        totals = self.order_by().aggregate(
+            total_units=Sum('course__unit'),
+            total_points=Sum(F('grade_point') * F('course__unit')),
+        )
+        total_units = totals['total_units'] or 0
+        total_points = totals['total_points'] or 0.0
+        totals.update(
+            total_units=total_units,
+            total_points=total_points,
+            gpa=round(total_points / total_units, 2) if total_units > 0 else 0,
+        )
+        return totals
+
 class Result(models.Model):
     SEMESTER_CHOICES = [
         ('1', 'First Semester'),
@@ -23,37 +133,79 @@ class Result(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(100)])
     grade = models.CharField(max_length=1, choices=GRADE_CHOICES)
+    # Snapshot of the grade's points under the scale that graded it
+    grade_point = models.FloatField(default=0.0)
     session = models.CharField(max_length=20)  # e.g., "2023/2024"
     semester = models.CharField(max_length=1, choices=SEMESTER_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ResultQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['student', 'course', 'session', 'semester']
         ordering = ['-session', '-semester', 'course__code']
+        # The unique key already serves lookups by student alone; these serve
+        # per-term reads for a course and the keyset-paginated results
+        # listing, which also answers a student's per-term reads
+        indexes = [
+            models.Index(fields=['course', 'session', 'semester'], name='result_course_term_idx'),
+            models.Index(fields=['-session', '-semester', 'student'], name='result_listing_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.course.code} ({self.session}/{self.semester})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was stored so save() can apply only the GPA and rollup deltas
+        if instance.get_deferred_fields() & {'student_id', 'course_id', 'session', 'semester', 'grade', 'grade_point', 'score'}:
+            instance._gpa_state = instance._rollup_state = UNKNOWN_STATE
+        else:
+            instance._gpa_state = instance.gpa_state()
+            instance._rollup_state = instance.rollup_state()
+        return instance
+    
     def save(self, *args, **kwargs):
         # Auto-calculate grade based on score
-        if self.score >= 70:
-            self.grade = 'A'
-        elif self.score >= 60:
-            self.grade = 'B'
-        elif self.score >= 50:
-            self.grade = 'C'
-        elif self.score >= 45:
-            self.grade = 'D'
-        else:
-            self.grade = 'F'
-        super().save(*args, **kwargs)
+        self.grade, self.grade_point = self.grade_table().grade_and_point(self.score)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'score' in update_fields:
+            # update_or_create() only lists the fields in its defaults
+            kwargs['update_fields'] = {*update_fields, 'grade', 'grade_point'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            previous, self._gpa_state = getattr(self, '_gpa_state', None), self.gpa_state()
+            previous_rollup, self._rollup_state = getattr(self, '_rollup_state', None), self.rollup_state()
+            if previous is UNKNOWN_STATE:
+                GPACalculation.rebuild_student(self.student_id)
+            else:
+                GPACalculation.apply_result_change(previous, self._gpa_state)
+            if previous_rollup is UNKNOWN_STATE:
+                CourseRollup.refresh([self._rollup_state[:3]])
+            else:
+                CourseRollup.apply_result_change(
+                    previous_rollup, self._rollup_state, {self.course_id: self.course.department_id}
+                )
     
-    @property
-    def grade_point(self):
-        """Return grade point for GPA calculation"""
-        grade_points = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
-        return grade_points.get(self.grade, 0.0)
+    def gpa_state(self):
+        """The fields that decide this result's contribution to GPA"""
+        return (self.student_id, self.course_id, self.session, self.semester, self.grade_point)
+    
+    def rollup_state(self):
+        """The fields that decide this result's contribution to the rollups"""
+        return (self.course_id, self.session, self.semester, self.grade, self.score, self.grade_point)
+    
+    def grade_table(self):
+        """The grading scale for this result's department and session"""
+        return get_grade_table(self.course.department_id, self.session)
+    
+    @staticmethod
+    def grade_for_score(score, department_id=None, session=''):
+        """Return the letter grade for a score"""
+        return get_grade_table(department_id, session).grade_for(score)
+
 
 class GPACalculation(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'student'})
@@ -63,60 +215,781 @@ class GPACalculation(models.Model):
     cgpa = models.FloatField()
     total_units = models.IntegerField()
     total_points = models.FloatField()
+    # Running totals over every term up to and including this one
+    cumulative_units = models.IntegerField(default=0)
+    cumulative_points = models.FloatField(default=0.0)
     calculated_at = models.DateTimeField(auto_now=True)
     
+    TOTAL_FIELDS = ['gpa', 'cgpa', 'total_units', 'total_points', 'cumulative_units', 'cumulative_points']
+    
     class Meta:
         unique_together = ['student', 'session', 'semester']
         ordering = ['-session', '-semester']
     
     def __str__(self):
         return f"{self.student.username} - {self.session}/{self.semester} (GPA: {self.gpa})"
+    
+    @property
+    def term(self):
+        return (self.session, self.semester)
+    
+    def refresh_averages(self):
+        """Derive gpa and cgpa from the stored unit and point totals"""
+        self.gpa = round(self.total_points / self.total_units, 2) if self.total_units > 0 else 0
+        self.cgpa = round(self.cumulative_points / self.cumulative_units, 2) if self.cumulative_units > 0 else 0
 
+    @classmethod
+    def compute_terms_for(cls, student_ids):
+        """Full recompute of every term row for many students, without saving.
+        
+        Returns {student_id: [rows in term order]} from a single grouped
+        query; each row's CGPA covers only the terms up to and including it.
+        """
+        rows_by_student = defaultdict(list)
+        term_totals = (
+            Result.objects.filter(student_id__in=student_ids)
+            .gpa_by_term()
+            .order_by('student', 'session', 'semester')
+        )
+        for totals in term_totals:
+            student_id = totals['student']
+            previous = rows_by_student[student_id][-1] if rows_by_student[student_id] else None
+            total_units, total_points = totals['total_units'] or 0, totals['total_points'] or 0.0
+            row = cls(
+                student_id=student_id,
+                session=totals['session'],
+                semester=totals['semester'],
+                total_units=total_units,
+                total_points=total_points,
+                cumulative_units=(previous.cumulative_units if previous else 0) + total_units,
+                cumulative_points=(previous.cumulative_points if previous else 0.0) + total_points,
+            )
+            row.refresh_averages()
+            rows_by_student[student_id].append(row)
+        return rows_by_student
+    
+    @classmethod
+    def compute_terms(cls, student):
+        """Full recompute of every term row for a student, without saving"""
+        student_id = getattr(student, 'pk', student)
+        return cls.compute_terms_for([student_id]).get(student_id, [])
+    
+    @classmethod
+    def store_terms(cls, student_ids, rows_by_student, batch_size=1000):
+        """Replace the stored term rows of student_ids with rows_by_student"""
+        rows = [row for student_id in student_ids for row in rows_by_student.get(student_id, [])]
+        current = {(row.student_id, row.session, row.semester) for row in rows}
+        stored = list(
+            cls.objects.filter(student_id__in=student_ids).values_list('pk', 'student_id', 'session', 'semester')
+        )
+        stale = [pk for pk, *key in stored if tuple(key) not in current]
+        student_terms = defaultdict(set)
+        for student_id, session, semester in current | {tuple(key) for _, *key in stored}:
+            student_terms[student_id].add((session, semester))
+        
+        with transaction.atomic():
+            if stale:
+                cls.objects.filter(pk__in=stale).delete()
+            bulk_upsert(
+                cls,
+                rows,
+                unique_fields=['student', 'session', 'semester'],
+                update_fields=cls.TOTAL_FIELDS + ['calculated_at'],
+                batch_size=batch_size,
+            )
+            DepartmentRollup.refresh_students(student_terms)
+        invalidate_dashboards(student_ids)
+        invalidate_transcripts(student_ids)
+        return rows
+    
+    @classmethod
+    def rebuild_students(cls, student_ids):
+        """Recompute and store every term row for many students"""
+        student_ids = list(student_ids)
+        return cls.store_terms(student_ids, cls.compute_terms_for(student_ids))
+    
+    @classmethod
+    def rebuild_student(cls, student):
+        """Recompute and store every term row for a student"""
+        return cls.rebuild_students([getattr(student, 'pk', student)])
+    
     @classmethod
     def calculate_gpa(cls, student, session, semester):
         """Calculate GPA for a specific semester"""
-        results = Result.objects.filter(
-            student=student,
-            session=session,
-            semester=semester
+        # Later terms depend on this one through CGPA, so rebuild them all
+        student_id = getattr(student, 'pk', student)
+        rows = cls.rebuild_student(student_id)
+        if not any(row.term == (session, semester) for row in rows):
+            return None
+        return cls.objects.get(student_id=student_id, session=session, semester=semester)
+    
+    @classmethod
+    def apply_delta(cls, student_id, session, semester, units, points):
+        """Adjust one term by a change in units and points.
+        
+        Only the student's own term rows are touched: the term itself and
+        the running totals of every term from it onwards.
+        """
+        if not units and not points:
+            return
+        
+        term = (session, semester)
+        with transaction.atomic():
+            rows = list(
+                cls.objects.select_for_update()
+                .filter(student_id=student_id)
+                .order_by('session', 'semester')
+            )
+            before = {row.term: (row.gpa, row.cgpa) for row in rows}
+            current = next((row for row in rows if row.term == term), None)
+            if current is None:
+                if units <= 0:
+                    # Nothing stored for this term, so there is nothing to remove
+                    return
+                previous = [row for row in rows if row.term < term]
+                current = cls(
+                    student_id=student_id,
+                    session=session,
+                    semester=semester,
+                    total_units=0,
+                    total_points=0.0,
+                    cumulative_units=previous[-1].cumulative_units if previous else 0,
+                    cumulative_points=previous[-1].cumulative_points if previous else 0.0,
+                )
+                rows.append(current)
+            
+            current.total_units += units
+            current.total_points += points
+            changed = [row for row in rows if row.term >= term]
+            for row in changed:
+                row.cumulative_units += units
+                row.cumulative_points += points
+                row.refresh_averages()
+            
+            changed.remove(current)
+            after = {**before, **{row.term: (row.gpa, row.cgpa) for row in changed}}
+            after.pop(term, None)
+            if current.total_units <= 0 and not Result.objects.filter(
+                student_id=student_id, session=session, semester=semester
+            ).exists():
+                if current.pk:
+                    current.delete()
+            else:
+                current.save()
+                after[term] = (current.gpa, current.cgpa)
+            
+            now = timezone.now()
+            for row in changed:
+                row.calculated_at = now
+            cls.objects.bulk_update(changed, cls.TOTAL_FIELDS + ['calculated_at'])
+            
+            # Each term row counts once towards its department's rollup for the term
+            deltas = {}
+            for changed_term in [row.term for row in rows if row.term >= term]:
+                old_gpa, old_cgpa = before.get(changed_term, (0.0, 0.0))
+                new_gpa, new_cgpa = after.get(changed_term, (0.0, 0.0))
+                deltas[changed_term] = {
+                    'student_count': (changed_term in after) - (changed_term in before),
+                    'gpa_total': new_gpa - old_gpa,
+                    'cgpa_total': new_cgpa - old_cgpa,
+                }
+            DepartmentRollup.apply_student_deltas(student_id, deltas)
+    
+    @classmethod
+    def apply_result_change(cls, old, new):
+        """Apply the GPA delta between two Result.gpa_state() values.
+        
+        None stands for a result that did not exist before (insert) or no
+        longer exists (delete).
+        """
+        if old == new:
+            return
+        
+        states = [state for state in (old, new) if state is not None]
+        units = dict(
+            Course.objects.filter(id__in={state[1] for state in states}).values_list('id', 'unit')
         )
         
-        if not results.exists():
-            return None
+        deltas = defaultdict(lambda: [0, 0.0])
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            student_id, course_id, session, semester, grade_point = state
+            unit = units.get(course_id, 0)
+            delta = deltas[(student_id, session, semester)]
+            delta[0] += sign * unit
+            delta[1] += sign * unit * grade_point
+        
+        for (student_id, session, semester), (unit_delta, point_delta) in deltas.items():
+            cls.apply_delta(student_id, session, semester, unit_delta, point_delta)
+    
+    @classmethod
+    def verify(cls, students=None, repair=False, tolerance=1e-6):
+        """Check stored running totals against a full recompute.
+        
+        Returns a list of (student_id, session, semester, field, stored,
+        expected) mismatches. With repair=True every student with a mismatch
+        is rebuilt from their results.
+        """
+        if students is None:
+            students = sorted(
+                set(Result.objects.order_by().values_list('student_id', flat=True).distinct())
+                | set(cls.objects.order_by().values_list('student_id', flat=True).distinct())
+            )
+        
+        mismatches = []
+        for student in students:
+            student_id = getattr(student, 'pk', student)
+            expected = {row.term: row for row in cls.compute_terms(student_id)}
+            stored = {row.term: row for row in cls.objects.filter(student_id=student_id)}
+            
+            student_mismatches = []
+            for term in sorted(expected.keys() | stored.keys()):
+                if term not in stored:
+                    student_mismatches.append((student_id, *term, 'row', None, 'present'))
+                    continue
+                if term not in expected:
+                    student_mismatches.append((student_id, *term, 'row', 'present', None))
+                    continue
+                for field in cls.TOTAL_FIELDS:
+                    stored_value = getattr(stored[term], field)
+                    expected_value = getattr(expected[term], field)
+                    if abs(stored_value - expected_value) > tolerance:
+                        student_mismatches.append((student_id, *term, field, stored_value, expected_value))
+            
+            if student_mismatches and repair:
+                cls.rebuild_student(student_id)
+            mismatches.extend(student_mismatches)
+        return mismatches
+
+def invalidate_result_dashboards(student_ids, course_ids):
+    """Invalidate the dashboards that show these results: the students' and their lecturers'"""
+    lecturer_ids = Course.lecturers.through.objects.filter(
+        course_id__in=set(course_ids)
+    ).values_list('user_id', flat=True)
+    invalidate_dashboards([*student_ids, *lecturer_ids])
+
+@receiver([post_save, post_delete], sender=Result)
+def result_changed(sender, instance, **kwargs):
+    invalidate_result_dashboards([instance.student_id], [instance.course_id])
+    invalidate_transcripts([instance.student_id])
+
+@receiver([post_save, post_delete], sender=GPACalculation)
+def gpa_changed(sender, instance, **kwargs):
+    invalidate_dashboards([instance.student_id])
+    invalidate_transcripts([instance.student_id])
+
+@receiver(post_delete, sender=GPACalculation)
+def remove_gpa_from_rollups(sender, instance, origin=None, **kwargs):
+    # Other deletions go through store_terms() or apply_delta(), which refresh the rollups
+    if deleted_with(origin, User):
+        DepartmentRollup.refresh_students({instance.student_id: [instance.term]})
+
+def deleted_with(origin, model):
+    """Whether a cascade started from deleting a model instance or queryset"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+@receiver(post_delete, sender=Result)
+def remove_result_from_gpa(sender, instance, origin=None, **kwargs):
+    # Rollups of a deleted course or department go with it
+    if not (deleted_with(origin, Course) or deleted_with(origin, Department)):
+        previous_rollup = getattr(instance, '_rollup_state', None) or instance.rollup_state()
+        if previous_rollup is UNKNOWN_STATE:
+            CourseRollup.refresh([(instance.course_id, instance.session, instance.semester)])
+        else:
+            CourseRollup.apply_result_change(previous_rollup, None)
+    # Deleting the student removes their GPA rows as well
+    if deleted_with(origin, User):
+        return
+    previous = getattr(instance, '_gpa_state', None) or instance.gpa_state()
+    if previous is UNKNOWN_STATE:
+        GPACalculation.rebuild_student(instance.student_id)
+    else:
+        GPACalculation.apply_result_change(previous, None)
+
+class GradingScale(models.Model):
+    """Grade boundaries for a department and/or session.
+    
+    A blank department or session applies the scale to all of them. Results
+    use the most specific matching scale, or grading.DEFAULT_BOUNDARIES when
+    none matches.
+    """
+    name = models.CharField(max_length=100)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
+    session = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['department', 'session']
+        ordering = ['department__name', '-session']
+    
+    def __str__(self):
+        scope = self.department.code if self.department else 'All departments'
+        return f"{self.name} ({scope}, {self.session or 'all sessions'})"
+    
+    def results(self):
+        """The results this scale could apply to"""
+        results = Result.objects.all()
+        if self.department_id:
+            results = results.filter(course__department_id=self.department_id)
+        if self.session:
+            results = results.filter(session=self.session)
+        return results
+    
+    def regrade(self, user=None):
+        """Regrade the results in this scale's scope and queue their GPA rebuild.
         
-        total_points = 0
-        total_units = 0
-        
-        for result in results:
-            points = result.grade_point * result.course.unit
-            total_points += points
-            total_units += result.course.unit
-        
-        gpa = total_points / total_units if total_units > 0 else 0
-        
-        # Calculate CGPA (cumulative)
-        all_results = Result.objects.filter(student=student)
-        cumulative_points = 0
-        cumulative_units = 0
-        
-        for result in all_results:
-            points = result.grade_point * result.course.unit
-            cumulative_points += points
-            cumulative_units += result.course.unit
-        
-        cgpa = cumulative_points / cumulative_units if cumulative_units > 0 else 0
-        
-        # Save or update GPA calculation
-        gpa_calc, created = cls.objects.update_or_create(
-            student=student,
-            session=session,
-            semester=semester,
-            defaults={
-                'gpa': round(gpa, 2),
-                'cgpa': round(cgpa, 2),
-                'total_units': total_units,
-                'total_points': total_points
-            }
+        Each result is graded against its own most specific scale, so results
+        covered by a narrower scale are left as they are.
+        """
+        from .jobs import enqueue_recompute
+        invalidate_grade_tables()
+        changed = self.results().regrade()
+        if changed:
+            enqueue_recompute(changed, user=user)
+        return changed
+
+class GradeBoundary(models.Model):
+    scale = models.ForeignKey(GradingScale, on_delete=models.CASCADE, related_name='boundaries')
+    grade = models.CharField(max_length=1, choices=Result.GRADE_CHOICES)
+    min_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(100)])
+    points = models.FloatField(validators=[MinValueValidator(0)])
+    
+    class Meta:
+        unique_together = ['scale', 'grade']
+        ordering = ['-min_score']
+    
+    def __str__(self):
+        return f"{self.grade}: {self.min_score:g}+ ({self.points} points)"
+
+@receiver([post_save, post_delete], sender=GradingScale)
+def scale_changed(sender, **kwargs):
+    invalidate_grade_tables()
+
+@receiver([post_save, post_delete], sender=GradeBoundary)
+def boundary_changed(sender, instance, **kwargs):
+    # Bump the scale's updated_at so other processes see a new scale version
+    GradingScale.objects.filter(pk=instance.scale_id).update(updated_at=timezone.now())
+    invalidate_grade_tables()
+
+class AcademicTerm(models.Model):
+    """Registry of the terms that have results or feedback, for filter dropdowns.
+    
+    Kept up to date as rows are written (see results.terms.register_terms);
+    terms are not dropped when their last row is deleted.
+    """
+    session = models.CharField(max_length=20)
+    semester = models.CharField(max_length=1, choices=Result.SEMESTER_CHOICES)
+    # Start year * 10 + semester, so terms sort chronologically as integers
+    sort_key = models.IntegerField(db_index=True)
+    has_results = models.BooleanField(default=False)
+    has_feedback = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    SOURCES = ('results', 'feedback')
+    
+    class Meta:
+        unique_together = ['session', 'semester']
+        ordering = ['-sort_key', '-session', '-semester']
+    
+    def __str__(self):
+        return f"{self.session} {self.get_semester_display()}"
+    
+    @staticmethod
+    def sort_key_for(session, semester):
+        match = re.match(r'\s*(\d{4})', session)
+        year = int(match.group(1)) if match else 0
+        return year * 10 + (int(semester) if semester.isdigit() else 0)
+    
+    @classmethod
+    def record(cls, session, semester, source):
+        """Register a term, flagging it as having rows of source"""
+        flag = f'has_{source}'
+        term, created = cls.objects.get_or_create(
+            session=session, semester=semester,
+            defaults={'sort_key': cls.sort_key_for(session, semester), flag: True},
         )
+        if not created and not getattr(term, flag):
+            setattr(term, flag, True)
+            term.save(update_fields=[flag, 'updated_at'])
+    
+    @classmethod
+    def sync(cls):
+        """Register every term found in results and feedback"""
+        from feedback.models import Feedback
+        for source, model in zip(cls.SOURCES, (Result, Feedback)):
+            for session, semester in model.objects.order_by().values_list('session', 'semester').distinct():
+                cls.record(session, semester, source)
+        return cls.objects.count()
+
+@receiver(post_save, sender=Result)
+def register_result_term(sender, instance, **kwargs):
+    register_terms([(instance.session, instance.semester)], 'results')
+
+@receiver([post_save, post_delete], sender=AcademicTerm)
+def term_changed(sender, **kwargs):
+    invalidate_terms()
+
+# Grades that count as a pass in the rollups
+FAIL_GRADE = 'F'
+GRADE_COUNT_FIELDS = {grade: f'{grade.lower()}_count' for grade, _ in Result.GRADE_CHOICES}
+
+def term_filter(field, keys):
+    """Q matching any of keys, given as (field value, session, semester) tuples"""
+    condition = models.Q(pk__in=[])
+    for value, session, semester in keys:
+        condition |= models.Q(**{field: value, 'session': session, 'semester': semester})
+    return condition
+
+class RollupTotals(models.Model):
+    """Result counts, sums and grade histogram shared by the rollup tables"""
+    result_count = models.IntegerField(default=0)
+    pass_count = models.IntegerField(default=0)
+    score_total = models.FloatField(default=0.0)
+    grade_point_total = models.FloatField(default=0.0)
+    a_count = models.IntegerField(default=0)
+    b_count = models.IntegerField(default=0)
+    c_count = models.IntegerField(default=0)
+    d_count = models.IntegerField(default=0)
+    f_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    RESULT_FIELDS = ['result_count', 'pass_count', 'score_total', 'grade_point_total', *GRADE_COUNT_FIELDS.values()]
+    STORED_FIELDS = RESULT_FIELDS
+    # A rollup with none of these left has nothing to show
+    COUNT_FIELDS = ['result_count']
+    
+    # Keys refreshed per query, to keep the OR of term filters short
+    REFRESH_CHUNK = 200
+    
+    class Meta:
+        abstract = True
+    
+    @staticmethod
+    def result_aggregates():
+        """Aggregates over Result rows for each of RESULT_FIELDS"""
+        return {
+            'result_count': models.Count('id'),
+            'pass_count': models.Count('id', filter=~models.Q(grade=FAIL_GRADE)),
+            'score_total': Sum('score'),
+            'grade_point_total': Sum('grade_point'),
+            **{field: models.Count('id', filter=models.Q(grade=grade)) for grade, field in GRADE_COUNT_FIELDS.items()},
+        }
+    
+    @staticmethod
+    def result_delta(state, sign):
+        """Change to RESULT_FIELDS from adding (sign 1) or removing (-1) a Result.rollup_state()"""
+        _, _, _, grade, score, grade_point = state
+        delta = {
+            'result_count': sign,
+            'pass_count': sign if grade != FAIL_GRADE else 0,
+            'score_total': sign * score,
+            'grade_point_total': sign * grade_point,
+        }
+        if grade in GRADE_COUNT_FIELDS:
+            delta[GRADE_COUNT_FIELDS[grade]] = sign
+        return delta
+    
+    @property
+    def pass_rate(self):
+        return round(100 * self.pass_count / self.result_count, 1) if self.result_count else 0
+    
+    @property
+    def average_score(self):
+        return round(self.score_total / self.result_count, 1) if self.result_count else 0
+    
+    @property
+    def grade_distribution(self):
+        """[(grade, count)] from the best grade down"""
+        return [(grade, getattr(self, field)) for grade, field in GRADE_COUNT_FIELDS.items()]
+    
+    @classmethod
+    def store(cls, keys, rows):
+        """Upsert rows, a {key: {field: value}} dict, and delete the keys with no row"""
+        key_field = f'{cls.KEY_FIELD}_id'
+        empty = [key for key in keys if key not in rows]
+        with transaction.atomic():
+            for start in range(0, len(empty), cls.REFRESH_CHUNK):
+                cls.objects.filter(term_filter(key_field, empty[start:start + cls.REFRESH_CHUNK])).delete()
+            bulk_upsert(
+                cls,
+                [
+                    cls(**{key_field: key[0], 'session': key[1], 'semester': key[2]}, **values)
+                    for key, values in rows.items()
+                ],
+                unique_fields=[cls.KEY_FIELD, 'session', 'semester'],
+                update_fields=cls.STORED_FIELDS + ['updated_at'],
+            )
+    
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Add {key: {field: change}} to the stored rollups in place.
         
-        return gpa_calc
+        Rollups left empty are deleted. Returns the keys that had no stored
+        rollup to change; the caller recomputes those.
+        """
+        key_field = f'{cls.KEY_FIELD}_id'
+        missing = []
+        shrunk = []
+        for key, changes in deltas.items():
+            changes = {field: change for field, change in changes.items() if change}
+            if not changes:
+                continue
+            rollups = cls.objects.filter(**{key_field: key[0], 'session': key[1], 'semester': key[2]})
+            if not rollups.update(**{field: F(field) + change for field, change in changes.items()},
+                                  updated_at=timezone.now()):
+                missing.append(key)
+            elif any(changes.get(field, 0) < 0 for field in cls.COUNT_FIELDS):
+                shrunk.append(key)
+        for start in range(0, len(shrunk), cls.REFRESH_CHUNK):
+            cls.objects.filter(
+                term_filter(key_field, shrunk[start:start + cls.REFRESH_CHUNK]),
+                **{f'{field}__lte': 0 for field in cls.COUNT_FIELDS},
+            ).delete()
+        return missing
+    
+    @classmethod
+    def stored_keys(cls, session=None):
+        rollups = cls.objects.all() if session is None else cls.objects.filter(session=session)
+        return set(rollups.values_list(f'{cls.KEY_FIELD}_id', 'session', 'semester'))
+
+class CourseRollup(RollupTotals):
+    """Results of one course in one term"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='rollups')
+    session = models.CharField(max_length=20)
+    semester = models.CharField(max_length=1, choices=Result.SEMESTER_CHOICES)
+    
+    KEY_FIELD = 'course'
+    
+    class Meta:
+        unique_together = ['course', 'session', 'semester']
+        ordering = ['-session', '-semester', 'course__code']
+    
+    def __str__(self):
+        return f"{self.course.code} {self.session}/{self.semester}"
+    
+    @classmethod
+    def refresh(cls, keys):
+        """Recompute the rollups of (course_id, session, semester) keys and their departments"""
+        keys = list(set(keys))
+        if not keys:
+            return
+        cls.recompute(keys)
+        
+        departments = dict(Course.objects.filter(id__in={key[0] for key in keys}).values_list('id', 'department_id'))
+        DepartmentRollup.refresh({
+            (departments[course_id], session, semester)
+            for course_id, session, semester in keys if course_id in departments
+        })
+    
+    @classmethod
+    def recompute(cls, keys):
+        """Recompute the course rollups of keys from their results, leaving departments alone"""
+        keys = list(set(keys))
+        if not keys:
+            return
+        rows = {}
+        for start in range(0, len(keys), cls.REFRESH_CHUNK):
+            for row in (
+                Result.objects.filter(term_filter('course_id', keys[start:start + cls.REFRESH_CHUNK]))
+                .order_by().values('course_id', 'session', 'semester')
+                .annotate(**cls.result_aggregates())
+            ):
+                rows[(row.pop('course_id'), row.pop('session'), row.pop('semester'))] = row
+        cls.store(keys, rows)
+    
+    @classmethod
+    def apply_result_change(cls, old, new, departments=None):
+        """Apply the rollup delta between two Result.rollup_state() values.
+        
+        None stands for a result that did not exist before or no longer
+        exists. departments maps course ids to department ids, saving the
+        lookup for courses already loaded.
+        """
+        if old == new:
+            return
+        states = [(state, sign) for state, sign in ((old, -1), (new, 1)) if state is not None]
+        departments = dict(departments or {})
+        unknown = {state[0] for state, _ in states} - departments.keys()
+        if unknown:
+            departments.update(Course.objects.filter(id__in=unknown).values_list('id', 'department_id'))
+        
+        course_deltas = defaultdict(lambda: defaultdict(int))
+        department_deltas = defaultdict(lambda: defaultdict(int))
+        for state, sign in states:
+            course_id, session, semester = state[:3]
+            for field, change in cls.result_delta(state, sign).items():
+                course_deltas[(course_id, session, semester)][field] += change
+                if departments.get(course_id) is not None:
+                    department_deltas[(departments[course_id], session, semester)][field] += change
+        
+        # Courses first: a department rollup that has to be recomputed sums them
+        cls.recompute(cls.apply_deltas(course_deltas))
+        DepartmentRollup.refresh(DepartmentRollup.apply_deltas(department_deltas))
+    
+    @classmethod
+    def rebuild(cls, session=None):
+        """Recompute every course rollup, or those of one session, and their departments"""
+        results = Result.objects.all() if session is None else Result.objects.filter(session=session)
+        keys = set(results.order_by().values_list('course_id', 'session', 'semester').distinct())
+        keys |= cls.stored_keys(session)
+        cls.refresh(keys)
+        return len(keys)
+
+class DepartmentRollup(RollupTotals):
+    """Results of a department's courses, and its students' GPAs, in one term"""
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='rollups')
+    session = models.CharField(max_length=20)
+    semester = models.CharField(max_length=1, choices=Result.SEMESTER_CHOICES)
+    # GPACalculation rows of the department's students for the term
+    student_count = models.IntegerField(default=0)
+    gpa_total = models.FloatField(default=0.0)
+    cgpa_total = models.FloatField(default=0.0)
+    
+    GPA_FIELDS = ['student_count', 'gpa_total', 'cgpa_total']
+    STORED_FIELDS = RollupTotals.RESULT_FIELDS + GPA_FIELDS
+    COUNT_FIELDS = ['result_count', 'student_count']
+    KEY_FIELD = 'department'
+    
+    class Meta:
+        unique_together = ['department', 'session', 'semester']
+        ordering = ['-session', '-semester', 'department__name']
+    
+    def __str__(self):
+        return f"{self.department.code} {self.session}/{self.semester}"
+    
+    @property
+    def average_gpa(self):
+        return round(self.gpa_total / self.student_count, 2) if self.student_count else 0
+    
+    @property
+    def average_cgpa(self):
+        return round(self.cgpa_total / self.student_count, 2) if self.student_count else 0
+    
+    @classmethod
+    def refresh(cls, keys):
+        """Recompute the rollups of (department_id, session, semester) keys.
+        
+        Result figures are summed from the department's course rollups, GPA
+        figures from its students' GPACalculation rows.
+        """
+        keys = list(set(keys))
+        if not keys:
+            return
+        rows = defaultdict(lambda: dict.fromkeys(cls.STORED_FIELDS, 0))
+        for start in range(0, len(keys), cls.REFRESH_CHUNK):
+            chunk = keys[start:start + cls.REFRESH_CHUNK]
+            for row in (
+                CourseRollup.objects.filter(term_filter('course__department_id', chunk))
+                .order_by().values('course__department_id', 'session', 'semester')
+                .annotate(**{field: Sum(field) for field in cls.RESULT_FIELDS})
+            ):
+                rows[(row.pop('course__department_id'), row.pop('session'), row.pop('semester'))].update(row)
+            for row in (
+                GPACalculation.objects.filter(term_filter('student__department_id', chunk))
+                .order_by().values('student__department_id', 'session', 'semester')
+                .annotate(student_count=models.Count('id'), gpa_total=Sum('gpa'), cgpa_total=Sum('cgpa'))
+            ):
+                rows[(row.pop('student__department_id'), row.pop('session'), row.pop('semester'))].update(row)
+        cls.store(keys, dict(rows))
+    
+    @classmethod
+    def apply_student_deltas(cls, student_id, deltas):
+        """Apply {(session, semester): {field: change}} GPA deltas of one student's term rows"""
+        department_id = User.objects.filter(pk=student_id).values_list('department_id', flat=True).first()
+        if department_id is None:
+            return
+        cls.refresh(cls.apply_deltas({
+            (department_id, session, semester): changes for (session, semester), changes in deltas.items()
+        }))
+    
+    @classmethod
+    def refresh_students(cls, student_terms):
+        """Recompute the rollups affected by GPA changes, given {student_id: terms}"""
+        departments = dict(
+            User.objects.filter(id__in=student_terms, department__isnull=False).values_list('id', 'department_id')
+        )
+        cls.refresh({
+            (departments[student_id], session, semester)
+            for student_id, terms in student_terms.items() if student_id in departments
+            for session, semester in terms
+        })
+    
+    @classmethod
+    def rebuild(cls, session=None):
+        """Recompute every department rollup, or those of one session, from GPA rows"""
+        gpa_rows = GPACalculation.objects.filter(student__department__isnull=False)
+        if session is not None:
+            gpa_rows = gpa_rows.filter(session=session)
+        keys = set(gpa_rows.order_by().values_list('student__department_id', 'session', 'semester').distinct())
+        keys |= cls.stored_keys(session)
+        cls.refresh(keys)
+        return len(keys)
+
+@receiver(pre_save, sender=Course)
+def note_course_fields(sender, instance, **kwargs):
+    # The unit and department the course's results were last counted under
+    instance._stored_fields = None if instance.pk is None else (
+        Course.objects.filter(pk=instance.pk).values_list('unit', 'department_id').first()
+    )
+
+@receiver(post_save, sender=Course)
+def rebuild_gpa_for_unit(sender, instance, created, **kwargs):
+    # Stored GPA totals were weighted by the old unit, and result deltas
+    # weigh by the current one, so bring the totals up to date first
+    stored = getattr(instance, '_stored_fields', None)
+    if created or stored is None or stored[0] == instance.unit:
+        return
+    student_ids = list(
+        Result.objects.filter(course=instance).order_by().values_list('student_id', flat=True).distinct()
+    )
+    for chunk in chunked(student_ids, GPA_REBUILD_CHUNK):
+        GPACalculation.rebuild_students(chunk)
+
+@receiver(post_save, sender=Course)
+def move_course_rollups(sender, instance, created, **kwargs):
+    # A course's results count towards its department's rollups
+    stored = getattr(instance, '_stored_fields', None)
+    if created or stored is None or stored[1] == instance.department_id:
+        return
+    terms = list(instance.rollups.values_list('session', 'semester'))
+    DepartmentRollup.refresh(
+        (department_id, session, semester)
+        for department_id in (stored[1], instance.department_id)
+        for session, semester in terms
+    )
+
+@receiver(pre_save, sender=User)
+def note_student_department(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and not {'department', 'department_id'} & set(update_fields)):
+        instance._stored_department_id = instance.department_id
+    else:
+        instance._stored_department_id = (
+            User.objects.filter(pk=instance.pk).values_list('department_id', flat=True).first()
+        )
+
+@receiver(post_save, sender=User)
+def move_student_rollups(sender, instance, created, **kwargs):
+    # A student's GPA rows count towards their department's rollups
+    previous = getattr(instance, '_stored_department_id', instance.department_id)
+    if created or previous == instance.department_id:
+        return
+    terms = list(GPACalculation.objects.filter(student_id=instance.pk).values_list('session', 'semester'))
+    DepartmentRollup.refresh(
+        (department_id, session, semester)
+        for department_id in (previous, instance.department_id) if department_id is not None
+        for session, semester in terms
+    )
+
+@receiver(pre_delete, sender=Course)
+def note_course_terms(sender, instance, **kwargs):
+    instance._rollup_terms = list(instance.rollups.values_list('session', 'semester'))
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_rollups(sender, instance, origin=None, **kwargs):
+    # The course's own rollups cascade; its department's totals still count them
+    if not deleted_with(origin, Department):
+        DepartmentRollup.refresh(
+            (instance.department_id, session, semester) for session, semester in instance._rollup_terms
+        )
@@ -0,0 +1,56 @@
+"""Process-wide cache of the AcademicTerm registry behind the session dropdowns"""
+from core.cache import VersionedCache, table_version
+
+# Seconds between checks for terms registered by another process
+TERM_RECHECK_SECONDS = 30
+
+
+def _term_version():
+    from .models import AcademicTerm
+    return table_version(AcademicTerm.objects.all())
+
+
+def _load_terms():
+    from .models import AcademicTerm
+    return tuple(AcademicTerm.objects.values_list('session', 'semester', 'has_results', 'has_feedback'))
+
+
+# (session, semester, has_results, has_feedback) rows, newest term first
+_terms = VersionedCache(_load_terms, _term_version, TERM_RECHECK_SECONDS)
+
+
+def academic_terms():
+    """The cached registry rows, reloaded only when the registry version moves"""
+    return _terms.get()
+
+
+def invalidate_terms():
+    """Drop this process's cached terms; other processes notice within TERM_RECHECK_SECONDS"""
+    _terms.invalidate()
+
+
+def session_choices(source=None):
+    """Sessions for a filter dropdown, newest first.
+
+    source 'results' or 'feedback' keeps only sessions with rows of that kind.
+    """
+    sessions = []
+    for session, _, has_results, has_feedback in academic_terms():
+        if source == 'results' and not has_results or source == 'feedback' and not has_feedback:
+            continue
+        if session not in sessions:
+            sessions.append(session)
+    return sessions
+
+
+def register_terms(terms, source):
+    """Record that (session, semester) terms now have rows of source.
+
+    Terms the cache already knows about cost no queries, so this is cheap
+    enough to call on every save.
+    """
+    from .models import AcademicTerm
+    position = AcademicTerm.SOURCES.index(source)
+    known = {(session, semester) for session, semester, *flags in academic_terms() if flags[position]}
+    for session, semester in set(terms) - known:
+        AcademicTerm.record(session, semester, source)
@@ -0,0 +1,249 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import Course, Department
+from .models import CourseRollup, DepartmentRollup, GPACalculation, Result
+
+User = get_user_model()
+
+
+class ResultTestCase(TestCase):
+    """A department with two courses of different units and two students"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Computer Science', code='CS')
+        cls.courses = [
+            Course.objects.create(title='Programming', code='CS101', unit=3, department=cls.department),
+            Course.objects.create(title='Databases', code='CS102', unit=2, department=cls.department),
+        ]
+        cls.students = [
+            User.objects.create_user(username=f'student{i}', password='x', role='student', department=cls.department)
+            for i in range(2)
+        ]
+
+    def add_result(self, student, course, score, session='2023/2024', semester='1'):
+        return Result.objects.create(student=student, course=course, score=score, session=session, semester=semester)
+
+
+class GPADeltaTests(ResultTestCase):
+    """Result saves and deletes keep the running GPA totals equal to a full recompute"""
+
+    def assertTotalsMatchRecompute(self):
+        self.assertEqual(GPACalculation.verify(), [])
+
+    def gpa(self, student, session='2023/2024', semester='1'):
+        return GPACalculation.objects.get(student=student, session=session, semester=semester)
+
+    def test_insert(self):
+        self.add_result(self.students[0], self.courses[0], 75)
+        self.add_result(self.students[0], self.courses[1], 55)
+        row = self.gpa(self.students[0])
+        self.assertEqual(row.total_units, 5)
+        self.assertEqual(row.gpa, round((3 * 4.0 + 2 * 2.0) / 5, 2))
+        self.assertTotalsMatchRecompute()
+
+    def test_update_score(self):
+        result = self.add_result(self.students[0], self.courses[0], 75)
+        result.score = 40
+        result.save()
+        self.assertEqual(self.gpa(self.students[0]).gpa, 0)
+        self.assertTotalsMatchRecompute()
+
+    def test_move_to_earlier_term_updates_later_cgpa(self):
+        self.add_result(self.students[0], self.courses[0], 75, session='2023/2024')
+        result = self.add_result(self.students[0], self.courses[1], 55, session='2023/2024', semester='2')
+        result.session = '2022/2023'
+        result.save()
+        self.assertFalse(GPACalculation.objects.filter(student=self.students[0], semester='2', session='2023/2024').exists())
+        self.assertEqual(self.gpa(self.students[0]).cumulative_units, 5)
+        self.assertTotalsMatchRecompute()
+
+    def test_update_or_create(self):
+        self.add_result(self.students[0], self.courses[0], 75)
+        Result.objects.update_or_create(
+            student=self.students[0], course=self.courses[0], session='2023/2024', semester='1',
+            defaults={'score': 62},
+        )
+        self.assertEqual(self.gpa(self.students[0]).gpa, 3.0)
+        self.assertTotalsMatchRecompute()
+
+    def test_delete_last_result_removes_term(self):
+        result = self.add_result(self.students[0], self.courses[0], 75)
+        result.delete()
+        self.assertFalse(GPACalculation.objects.filter(student=self.students[0]).exists())
+        self.assertTotalsMatchRecompute()
+
+    def test_deferred_load_falls_back_to_rebuild(self):
+        self.add_result(self.students[0], self.courses[0], 75)
+        result = Result.objects.only('pk', 'score', 'course').get()
+        result.score = 50
+        result.save()
+        self.assertTotalsMatchRecompute()
+
+    def test_unit_change_then_delete(self):
+        first = self.add_result(self.students[0], self.courses[0], 75)
+        self.add_result(self.students[0], self.courses[1], 75)
+        self.add_result(self.students[1], self.courses[0], 55)
+        course = self.courses[0]
+        course.unit = 1
+        course.save()
+        self.assertTotalsMatchRecompute()
+
+        first.delete()
+        row = self.gpa(self.students[0])
+        self.assertEqual(row.total_units, 2)
+        self.assertEqual(row.gpa, 4.0)
+        self.assertTotalsMatchRecompute()
+
+    def test_other_course_edits_leave_gpa_alone(self):
+        self.add_result(self.students[0], self.courses[0], 75)
+        calculated_at = self.gpa(self.students[0]).calculated_at
+        course = self.courses[0]
+        course.title = 'Programming I'
+        course.save()
+        self.assertEqual(self.gpa(self.students[0]).calculated_at, calculated_at)
+
+
+class RollupDeltaTests(ResultTestCase):
+    """Rollups kept up to date by deltas equal the rollups rebuilt from scratch"""
+
+    def snapshot(self):
+        return [
+            sorted(
+                tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+                for row in model.objects.values_list(f'{model.KEY_FIELD}_id', 'session', 'semester', *model.STORED_FIELDS)
+            )
+            for model in (CourseRollup, DepartmentRollup)
+        ]
+
+    def assertRollupsMatchRebuild(self):
+        stored = self.snapshot()
+        CourseRollup.rebuild()
+        DepartmentRollup.rebuild()
+        self.assertEqual(stored, self.snapshot())
+
+    def setUp(self):
+        self.results = [
+            self.add_result(student, course, score, session=session)
+            for student, score in zip(self.students, (75, 48))
+            for course in self.courses
+            for session in ('2022/2023', '2023/2024')
+        ]
+
+    def test_insert(self):
+        rollup = DepartmentRollup.objects.get(department=self.department, session='2023/2024', semester='1')
+        self.assertEqual(rollup.result_count, 4)
+        self.assertEqual(rollup.student_count, 2)
+        self.assertRollupsMatchRebuild()
+
+    def test_update_and_move_term(self):
+        result = self.results[0]
+        result.score = 20
+        result.save()
+        self.assertRollupsMatchRebuild()
+        result.session = '2021/2022'
+        result.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_delete(self):
+        self.results[0].delete()
+        Result.objects.filter(session='2022/2023').delete()
+        self.assertFalse(CourseRollup.objects.filter(session='2022/2023').exists())
+        self.assertRollupsMatchRebuild()
+
+    def test_student_changes_department(self):
+        other = Department.objects.create(name='Mathematics', code='MTH')
+        student = self.students[0]
+        student.department = other
+        student.save()
+        rollup = DepartmentRollup.objects.get(department=self.department, session='2023/2024', semester='1')
+        self.assertEqual(rollup.student_count, 1)
+        self.assertEqual(DepartmentRollup.objects.get(department=other, session='2023/2024', semester='1').student_count, 1)
+        self.assertRollupsMatchRebuild()
+
+    def test_student_leaves_department(self):
+        student = self.students[0]
+        student.department = None
+        student.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_course_changes_department(self):
+        course = self.courses[0]
+        course.department = Department.objects.create(name='Mathematics', code='MTH')
+        course.save()
+        self.assertRollupsMatchRebuild()
+
+    def test_student_deleted(self):
+        self.students[1].delete()
+        self.assertRollupsMatchRebuild()
+
+
+class ResultListingTests(ResultTestCase):
+    """The results listing pages through every visible result exactly once, in listing order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        cls.lecturer = User.objects.create_user(username='lecturer', password='x', role='lecturer')
+        cls.courses[0].lecturers.add(cls.lecturer)
+        cls.results = [
+            Result.objects.create(student=student, course=course, score=60, session=session, semester=semester)
+            for session in ('2022/2023', '2023/2024')
+            for semester in ('1', '2')
+            for course in cls.courses
+            for student in cls.students
+        ]
+
+    def page_through(self, user, **params):
+        self.client.force_login(user)
+        ids = []
+        cursor = None
+        while True:
+            response = self.client.get(
+                reverse('results_management_data'), {**params, 'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 3)
+            ids.extend(result['id'] for result in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return ids
+
+    def expected(self, results):
+        ordered = sorted(results, key=lambda result: result.id)
+        for field in ('student_id', 'semester', 'session'):
+            ordered.sort(key=lambda result: getattr(result, field), reverse=field != 'student_id')
+        return [result.id for result in ordered]
+
+    def test_admin_sees_every_result_once(self):
+        self.assertEqual(self.page_through(self.admin), self.expected(self.results))
+
+    def test_filters_apply_to_every_page(self):
+        self.assertEqual(
+            self.page_through(self.admin, session='2023/2024'),
+            self.expected([result for result in self.results if result.session == '2023/2024']),
+        )
+
+    def test_lecturer_sees_only_their_courses(self):
+        self.assertEqual(
+            self.page_through(self.lecturer),
+            self.expected([result for result in self.results if result.course_id == self.courses[0].pk]),
+        )
+
+    def test_rows_added_before_the_cursor_do_not_shift_pages(self):
+        self.client.force_login(self.admin)
+        first = self.client.get(reverse('results_management_data'), {'page_size': 3}).json()
+        self.add_result(self.students[0], self.courses[0], 70, session='2024/2025')
+        rest = self.page_through(self.admin, cursor=first['next_cursor'])
+        self.assertEqual([result['id'] for result in first['results']] + rest, self.expected(self.results))
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('results_management_data'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('results_management'), {'cursor': 'not-a-cursor', 'session': '2023/2024'})
+        self.assertRedirects(response, f"{reverse('results_management')}?session=2023%2F2024", fetch_redirect_response=False)
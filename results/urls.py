@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.results_management, name='results_management'),
+    path('data/', views.results_management_data, name='results_management_data'),
     path('upload/', views.upload_results, name='upload_results'),
     path('gpa/', views.gpa_calculator, name='gpa_calculator'),
     path('recalculate-gpa/', views.recalculate_gpa, name='recalculate_gpa'),
@@ -3,53 +3,117 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.http import JsonResponse
 from django.contrib import messages
+from django.core.files.storage import default_storage
+from django.urls import reverse
 from django.db.models import Q
 from accounts.models import Course, Department
+from core.pagination import InvalidCursor, paginate_request
 from .models import Result, GPACalculation
-import csv
-from io import TextIOWrapper
+from .ingest import CSV_ENCODINGS, DEFAULT_ENCODING
+from .jobs import enqueue_ingest
+from .terms import session_choices
 
 User = get_user_model()
 
+# Keyset order of the results listing; matches Result's result_listing_idx
+RESULT_LISTING_ORDER = ['-session', '-semester', 'student_id', 'id']
+
 @login_required
 def results_management(request):
     if request.user.role not in ['admin', 'lecturer']:
         return redirect('dashboard')
     
-    # Get filter parameters
+    try:
+        page = results_page(request)
+    except InvalidCursor:
+        messages.error(request, 'That page link has expired; showing the first page.')
+        query = request.GET.copy()
+        query.pop('cursor', None)
+        return redirect(f"{reverse('results_management')}?{query.urlencode()}")
+    
+    # Query strings for the pager links, keeping the filters
+    query = request.GET.copy()
+    first_query = None
+    if query.pop('cursor', None):
+        first_query = query.urlencode()
+    next_query = None
+    if page.has_next:
+        query['cursor'] = page.next_cursor
+        next_query = query.urlencode()
+    
+    context = {
+        'results': page,
+        'next_query': next_query,
+        'first_query': first_query,
+        'courses': Course.objects.all() if request.user.role == 'admin' else Course.objects.filter(lecturers=request.user),
+        'sessions': session_choices('results'),
+        'current_session': request.GET.get('session', ''),
+        'current_semester': request.GET.get('semester', ''),
+        'current_course': request.GET.get('course', ''),
+        'current_student': request.GET.get('student', ''),
+    }
+    return render(request, 'results/results_management.html', context)
+
+@login_required
+def results_management_data(request):
+    """AJAX endpoint: one page of the results listing; pass next_cursor back as ?cursor="""
+    if request.user.role not in ['admin', 'lecturer']:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        page = results_page(request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    data = {
+        'results': [
+            {
+                'id': result.id,
+                'student': {
+                    'id': result.student_id,
+                    'username': result.student.username,
+                    'name': result.student.get_full_name() or result.student.username,
+                },
+                'course': {
+                    'id': result.course_id,
+                    'code': result.course.code,
+                    'title': result.course.title,
+                },
+                'score': result.score,
+                'grade': result.grade,
+                'grade_point': result.grade_point,
+                'session': result.session,
+                'semester': result.semester,
+            }
+            for result in page
+        ],
+        'next_cursor': page.next_cursor,
+    }
+    return JsonResponse(data)
+
+def results_page(request):
+    """One keyset page of the results visible to the user, filtered by the query string"""
+    results = Result.objects.select_related('student', 'course')
+    
     session = request.GET.get('session', '')
     semester = request.GET.get('semester', '')
     course_id = request.GET.get('course', '')
-    student_id = request.GET.get('student', '')
-    
-    # Base queryset
-    results = Result.objects.all()
+    student = request.GET.get('student', '').strip()
     
-    # Apply filters
     if session:
         results = results.filter(session=session)
     if semester:
         results = results.filter(semester=semester)
-    if course_id:
+    if course_id.isdigit():
         results = results.filter(course_id=course_id)
-    if student_id:
-        results = results.filter(student_id=student_id)
+    if student:
+        results = results.filter(student__username=student)
     
     # If lecturer, only show their courses
     if request.user.role == 'lecturer':
-        results = results.filter(course__lecturers=request.user)
+        results = results.filter(course_id__in=request.user.taught_courses.values('id'))
     
-    context = {
-        'results': results.order_by('-session', '-semester', 'student__username'),
-        'courses': Course.objects.all() if request.user.role == 'admin' else Course.objects.filter(lecturers=request.user),
-        'students': User.objects.filter(role='student'),
-        'sessions': Result.objects.values_list('session', flat=True).distinct().order_by('-session'),
-        'current_session': session,
-        'current_semester': semester,
-        'current_course': course_id,
-        'current_student': student_id,
-    }
-    return render(request, 'results/results_management.html', context)
+    return paginate_request(request, results, RESULT_LISTING_ORDER)
 
 @login_required
 def upload_results(request):
@@ -66,10 +130,13 @@ def upload_results(request):
     
     courses = Course.objects.all() if request.user.role == 'admin' else Course.objects.filter(lecturers=request.user)
     students = User.objects.filter(role='student')
+    job_id = request.GET.get('job', '')
     
     context = {
         'courses': courses,
         'students': students,
+        'csv_encodings': CSV_ENCODINGS,
+        'job_id': job_id if job_id.isdigit() else None,
     }
     return render(request, 'results/upload_results.html', context)
 
@@ -89,7 +156,7 @@ def handle_manual_upload(request):
             messages.error(request, 'You do not have permission to upload results for this course.')
             return redirect('upload_results')
         
-        # Create or update result
+        # Create or update result; saving applies the GPA delta
         result, created = Result.objects.update_or_create(
             student=student,
             course=course,
@@ -98,9 +165,6 @@ def handle_manual_upload(request):
             defaults={'score': score}
         )
         
-        # Calculate GPA
-        GPACalculation.calculate_gpa(student, session, semester)
-        
         action = 'created' if created else 'updated'
         messages.success(request, f'Result {action} successfully for {student.get_full_name()} in {course.code}')
         
@@ -119,48 +183,16 @@ def handle_csv_upload(request):
             messages.error(request, 'Please upload a CSV file.')
             return redirect('upload_results')
         
-        # Read CSV file
-        file_data = csv_file.read().decode('utf-8')
-        csv_data = csv.DictReader(file_data.splitlines())
-        
-        success_count = 0
-        error_count = 0
-        
-        for row in csv_data:
-            try:
-                # Expected CSV columns: student_username, course_code, score
-                student_username = row.get('student_username', '').strip()
-                course_code = row.get('course_code', '').strip()
-                score = float(row.get('score', 0))
-                
-                student = User.objects.get(username=student_username, role='student')
-                course = Course.objects.get(code=course_code)
-                
-                # Check lecturer permission
-                if request.user.role == 'lecturer' and request.user not in course.lecturers.all():
-                    continue
-                
-                # Create or update result
-                Result.objects.update_or_create(
-                    student=student,
-                    course=course,
-                    session=session,
-                    semester=semester,
-                    defaults={'score': score}
-                )
-                
-                # Calculate GPA
-                GPACalculation.calculate_gpa(student, session, semester)
-                success_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                continue
+        encoding = request.POST.get('csv_encoding') or DEFAULT_ENCODING
+        if encoding not in dict(CSV_ENCODINGS):
+            messages.error(request, f'Unsupported file encoding: {encoding}')
+            return redirect('upload_results')
         
-        if success_count > 0:
-            messages.success(request, f'Successfully uploaded {success_count} results.')
-        if error_count > 0:
-            messages.warning(request, f'{error_count} rows had errors and were skipped.')
+        # Hand the file to the job worker; expected columns: student_username, course_code, score
+        path = default_storage.save('uploads/results/upload.csv', csv_file)
+        job = enqueue_ingest(path, session, semester, encoding, request.user)
+        messages.info(request, f'CSV upload queued as job #{job.id}. Progress is shown below.')
+        return redirect(f"{reverse('upload_results')}?job={job.id}")
             
     except Exception as e:
         messages.error(request, f'Error processing CSV file: {str(e)}')
@@ -172,7 +204,7 @@ def gpa_calculator(request):
     if request.user.role not in ['admin', 'lecturer']:
         return redirect('dashboard')
     
-    gpa_calculations = GPACalculation.objects.all().order_by('-session', '-semester', 'student__username')
+    gpa_calculations = GPACalculation.objects.select_related('student').order_by('-session', '-semester', 'student__username')
     
     # Filter by student if provided
     student_id = request.GET.get('student')
@@ -223,15 +255,9 @@ def delete_result(request, result_id):
             messages.error(request, 'You do not have permission to delete this result.')
             return redirect('results_management')
         
-        student = result.student
-        session = result.session
-        semester = result.semester
-        
+        # Deleting removes the result's units and points from the GPA rows
         result.delete()
         
-        # Recalculate GPA after deletion
-        GPACalculation.calculate_gpa(student, session, semester)
-        
         messages.success(request, 'Result deleted successfully.')
     
     return redirect('results_management')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Benchmark for parsing uploaded results CSV files.
+Compares the old read()/decode()/splitlines() approach with the streaming
+reader used by the upload view, reporting time and peak Python memory.
+
+Run from the project root: python scripts/benchmark_csv_upload.py [--sizes 10 100]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
+django.setup()
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+from results.ingest import read_csv_upload
+
+MB = 1024 * 1024
+
+
+def make_upload(size_mb):
+    """Write a synthetic results CSV of roughly size_mb to a temporary upload"""
+    upload = TemporaryUploadedFile('results.csv', 'text/csv', 0, 'utf-8')
+    upload.write(b'student_username,course_code,score\n')
+    target = size_mb * MB
+    i = 0
+    while upload.tell() < target:
+        block = ''.join(
+            f'student{n:06d},CSC{n % 400:03d},{(n * 37) % 101}.5\n'
+            for n in range(i, i + 10000)
+        )
+        upload.write(block.encode('utf-8'))
+        i += 10000
+    upload.size = upload.tell()
+    upload.seek(0)
+    return upload
+
+
+def parse_legacy(upload):
+    file_data = upload.read().decode('utf-8')
+    return sum(1 for _ in csv.DictReader(file_data.splitlines()))
+
+
+def parse_streaming(upload):
+    return sum(1 for _ in read_csv_upload(upload))
+
+
+def measure(parse, upload):
+    upload.seek(0)
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = parse(upload)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def run_benchmark(sizes):
+    print(f"{'size':>8} {'parser':>10} {'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak MB':>9}")
+    for size_mb in sizes:
+        upload = make_upload(size_mb)
+        try:
+            for name, parse in (('legacy', parse_legacy), ('streaming', parse_streaming)):
+                rows, elapsed, peak = measure(parse, upload)
+                print(
+                    f"{size_mb:>6}MB {name:>10} {rows:>10} {elapsed:>9.2f} "
+                    f"{rows / elapsed:>10.0f} {peak / MB:>9.1f}"
+                )
+        finally:
+            upload.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100], help='File sizes in MB')
+    args = parser.parse_args()
+    run_benchmark(args.sizes)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for grading scores.
+Compares the per-row if/elif ladder Result.save() used to run with the
+shared GradeTable, both per row and vectorised with NumPy, and checks that
+all three agree.
+
+Run from the project root: python scripts/benchmark_grading.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results.grading import DEFAULT_GRADE_TABLE
+
+
+def grade_with_ladder(score):
+    if score >= 70:
+        return 'A'
+    elif score >= 60:
+        return 'B'
+    elif score >= 50:
+        return 'C'
+    elif score >= 45:
+        return 'D'
+    else:
+        return 'F'
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - started
+
+
+def run_benchmark(rows):
+    rng = np.random.default_rng(42)
+    # Whole and half marks, as entered by lecturers
+    scores = rng.integers(0, 201, rows) / 2
+    score_list = scores.tolist()
+
+    ladder, ladder_time = timed(lambda: [grade_with_ladder(score) for score in score_list])
+    table, table_time = timed(lambda: [DEFAULT_GRADE_TABLE.grade_for(score) for score in score_list])
+    (grades, points), vector_time = timed(DEFAULT_GRADE_TABLE.grade_many, scores)
+
+    assert ladder == table == grades.tolist(), 'grading paths disagree'
+    assert points.tolist() == [DEFAULT_GRADE_TABLE.point_for(grade) for grade in ladder]
+
+    print(f"{'method':>22} {'seconds':>9} {'scores/s':>14}")
+    for name, elapsed in (
+        ('if/elif ladder', ladder_time),
+        ('GradeTable.grade_for', table_time),
+        ('GradeTable.grade_many', vector_time),
+    ):
+        print(f"{name:>22} {elapsed:>9.3f} {rows / elapsed:>14,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of scores to grade')
+    args = parser.parse_args()
+    run_benchmark(args.rows)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Benchmark for the composite indexes on Result and Feedback.
+Builds a throwaway test database, loads a synthetic dataset, then runs the
+hot filters with the Meta.indexes dropped and again with them in place,
+printing the EXPLAIN plan and the mean query time of each.
+
+Run from the project root: python scripts/benchmark_query_plans.py [--students 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from accounts.models import Department, Course
+from feedback.models import Feedback
+from results.models import Result
+
+User = get_user_model()
+
+SESSIONS = ['2020/2021', '2021/2022', '2022/2023', '2023/2024']
+INDEXED_MODELS = [Result, Feedback]
+BATCH_SIZE = 2000
+
+
+def load_dataset(students, courses, lecturers, per_term):
+    department = Department.objects.create(name='Benchmark', code='BENCH')
+    lecturer_objs = User.objects.bulk_create([
+        User(username=f'lecturer{n:04d}', role='lecturer', department=department)
+        for n in range(lecturers)
+    ])
+    course_objs = Course.objects.bulk_create([
+        Course(title=f'Course {n}', code=f'BEN{n:04d}', unit=(n % 4) + 1, department=department)
+        for n in range(courses)
+    ])
+    teaching = {course.id: lecturer_objs[n % lecturers].id for n, course in enumerate(course_objs)}
+    student_objs = User.objects.bulk_create(
+        [User(username=f'student{n:06d}', role='student', department=department) for n in range(students)],
+        batch_size=BATCH_SIZE,
+    )
+
+    rng = random.Random(42)
+    course_ids = list(teaching)
+    now = timezone.now()
+    results, feedback = [], []
+    for student in student_objs:
+        for session in SESSIONS:
+            for semester in ('1', '2'):
+                for course_id in rng.sample(course_ids, per_term):
+                    results.append(Result(
+                        student_id=student.id, course_id=course_id, session=session,
+                        semester=semester, score=rng.randint(0, 100), grade='F',
+                    ))
+                    if rng.random() < 0.3:
+                        feedback.append(Feedback(
+                            student_id=student.id, course_id=course_id, lecturer_id=teaching[course_id],
+                            rating=rng.randint(1, 5), session=session, semester=semester,
+                            created_at=now - timedelta(minutes=len(feedback)),
+                        ))
+    Result.objects.bulk_create(results, batch_size=BATCH_SIZE)
+    Feedback.objects.bulk_create(feedback, batch_size=BATCH_SIZE)
+    return student_objs, teaching, len(results), len(feedback)
+
+
+def hot_queries(student_ids, teaching):
+    """The access paths the indexes are designed for, as (name, queryset factory)"""
+    pairs = list(teaching.items())
+    return [
+        ('result by student+term', lambda rng: Result.objects.filter(
+            student_id=rng.choice(student_ids), session=rng.choice(SESSIONS), semester='1',
+        ).order_by().values_list('course_id', 'grade_point')),
+        ('result by course+term', lambda rng: Result.objects.filter(
+            course_id=rng.choice(pairs)[0], session=rng.choice(SESSIONS), semester='2',
+        ).order_by().values_list('student_id', 'score')),
+        ('result by student', lambda rng: Result.objects.filter(
+            student_id=rng.choice(student_ids),
+        ).order_by().values_list('id', flat=True)),
+        ('feedback by lecturer', lambda rng: Feedback.objects.filter(
+            lecturer_id=rng.choice(pairs)[1],
+        ).order_by('-created_at').values_list('id', flat=True)[:20]),
+        ('feedback by course+term', lambda rng: Feedback.objects.filter(
+            course_id=rng.choice(pairs)[0], lecturer_id=rng.choice(pairs)[1],
+            session=rng.choice(SESSIONS), semester='1',
+        ).values_list('id', flat=True)),
+    ]
+
+
+def measure(queries, repeat):
+    timings = {}
+    for name, make_queryset in queries:
+        rng = random.Random(7)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(make_queryset(rng))
+        timings[name] = (time.perf_counter() - started) / repeat
+    return timings
+
+
+def set_indexes(present):
+    with connection.schema_editor() as editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                if present:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+
+
+def run_benchmark(students, courses, lecturers, per_term, repeat):
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        started = time.perf_counter()
+        student_objs, teaching, result_count, feedback_count = load_dataset(students, courses, lecturers, per_term)
+        print(f'Loaded {result_count} results and {feedback_count} feedback rows '
+              f'in {time.perf_counter() - started:.1f}s on {connection.vendor}.')
+        student_ids = [student.id for student in student_objs]
+        queries = hot_queries(student_ids, teaching)
+
+        report = {}
+        for label, present in (('before', False), ('after', True)):
+            set_indexes(present)
+            with connection.cursor() as cursor:
+                if connection.vendor in ('sqlite', 'postgresql'):
+                    cursor.execute('ANALYZE')
+            report[label] = measure(queries, repeat)
+            print(f'\n== {label}: Meta.indexes {"present" if present else "dropped"}')
+            for name, make_queryset in queries:
+                print(f'-- {name}\n{make_queryset(random.Random(7)).explain()}')
+
+        print(f"\n{'query':>24} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, _ in queries:
+            before, after = report['before'][name], report['after'][name]
+            print(f"{name:>24} {before * 1000:>10.3f} {after * 1000:>10.3f} {before / after:>7.1f}x")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=5000, help='Synthetic students to load')
+    parser.add_argument('--courses', type=int, default=200, help='Synthetic courses to load')
+    parser.add_argument('--lecturers', type=int, default=50, help='Synthetic lecturers to load')
+    parser.add_argument('--per-term', type=int, default=5, help='Results per student per semester')
+    parser.add_argument('--repeat', type=int, default=500, help='Executions of each query per run')
+    args = parser.parse_args()
+    run_benchmark(args.students, args.courses, args.lecturers, args.per_term, args.repeat)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for feedback sentiment analysis.
+Compares the substring scan Feedback.save() used to run, which rebuilt its
+word lists per comment, with feedback.sentiment per comment and through the
+analyze_many() batch API, reporting comments per second and how many labels
+changed now that keywords must match whole words.
+
+Run from the project root: python scripts/benchmark_sentiment.py [--comments 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback.sentiment import analyze_many, sentiment_for
+
+# Filler and keyword look-alikes, so the old substring scan has something to trip on
+FILLER = (
+    'the lectures were the tutorials and labs this course was on time covered topics in '
+    'goodness hardware clearly badge weakness poorly patiently lacking engagingly'
+).split()
+
+KEYWORDS = (
+    'excellent great good amazing helpful clear engaging interesting patient thorough '
+    'well-organized terrible bad boring unclear unhelpful difficult hard poor weak confusing'
+).split()
+
+
+def substring_sentiment(comment, rating):
+    """The old Feedback.analyze_sentiment: word lists built and scanned per call"""
+    if not comment:
+        return 'neutral'
+
+    comment_lower = comment.lower()
+
+    positive_words = [
+        'excellent', 'great', 'good', 'amazing', 'wonderful', 'fantastic',
+        'outstanding', 'brilliant', 'helpful', 'clear', 'engaging', 'interesting',
+        'knowledgeable', 'patient', 'supportive', 'inspiring', 'effective',
+        'well-organized', 'thorough', 'professional', 'dedicated', 'passionate'
+    ]
+    negative_words = [
+        'terrible', 'awful', 'bad', 'horrible', 'disappointing', 'confusing',
+        'boring', 'unclear', 'unhelpful', 'disorganized', 'unprofessional',
+        'difficult', 'hard', 'complicated', 'frustrating', 'poor', 'weak',
+        'inadequate', 'insufficient', 'lacking', 'unsatisfactory'
+    ]
+
+    positive_count = sum(1 for word in positive_words if word in comment_lower)
+    negative_count = sum(1 for word in negative_words if word in comment_lower)
+
+    if rating >= 4:
+        positive_count += 1
+    elif rating <= 2:
+        negative_count += 1
+
+    if positive_count > negative_count:
+        return 'positive'
+    elif negative_count > positive_count:
+        return 'negative'
+    else:
+        return 'neutral'
+
+
+def make_comments(count):
+    rng = random.Random(42)
+    comments = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(0, 30)) + rng.choices(KEYWORDS, k=rng.randint(0, 3))
+        rng.shuffle(words)
+        comments.append(' '.join(words).capitalize())
+    ratings = [rng.randint(1, 5) for _ in range(count)]
+    return comments, ratings
+
+
+def timed(func):
+    started = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - started
+
+
+def run_benchmark(count):
+    comments, ratings = make_comments(count)
+    words = sum(len(comment.split()) for comment in comments)
+    print(f'{count:,} comments, {words / count:.1f} words on average.')
+
+    old, old_time = timed(lambda: [substring_sentiment(c, r) for c, r in zip(comments, ratings)])
+    single, single_time = timed(lambda: [sentiment_for(c, r) for c, r in zip(comments, ratings)])
+    batch, batch_time = timed(lambda: analyze_many(comments, ratings))
+    assert single == batch, 'sentiment_for and analyze_many disagree'
+
+    print(f"{'method':>20} {'seconds':>9} {'comments/s':>14}")
+    for name, elapsed in (
+        ('substring scan', old_time),
+        ('sentiment_for', single_time),
+        ('analyze_many', batch_time),
+    ):
+        print(f"{name:>20} {elapsed:>9.3f} {count / elapsed:>14,.0f}")
+
+    changed = sum(1 for before, after in zip(old, batch) if before != after)
+    print(f'{changed:,} labels changed by whole-word matching ({100 * changed / count:.1f}%).')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=1_000_000, help='Number of comments to analyze')
+    args = parser.parse_args()
+    run_benchmark(args.comments)
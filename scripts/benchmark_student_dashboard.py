@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Benchmark for assembling the student dashboard.
+Builds a throwaway test database with one student holding several sessions
+of results, then compares the old per-term query loop with the single-pass
+core.views.student_record, reporting time and queries per build and
+checking that both produce the same terms.
+
+Run from the project root: python scripts/benchmark_student_dashboard.py [--sessions 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from accounts.models import Department, Course
+from core.views import student_record
+from results.models import Result, GPACalculation
+
+User = get_user_model()
+
+
+def legacy_record(student):
+    """The dashboard's old assembly: three walks and a GPA query per term"""
+    student_results = Result.objects.filter(student=student).order_by('-session', '-semester', 'course__code')
+    gpa_calculations = GPACalculation.objects.filter(student=student).order_by('-session', '-semester')
+    total_courses = student_results.values('course').distinct().count()
+    total_units = sum(result.course.unit for result in student_results)
+    current_cgpa = gpa_calculations.first().cgpa if gpa_calculations.exists() else 0
+
+    results_by_session = defaultdict(lambda: defaultdict(dict))
+    for result in student_results:
+        semester_display = result.get_semester_display()
+        if semester_display not in results_by_session[result.session]:
+            gpa_data = gpa_calculations.filter(session=result.session, semester=result.semester).first()
+            results_by_session[result.session][semester_display] = {
+                'results': [],
+                'gpa': gpa_data.gpa if gpa_data else 0,
+                'cgpa': gpa_data.cgpa if gpa_data else 0,
+            }
+        results_by_session[result.session][semester_display]['results'].append(result)
+
+    for semesters in results_by_session.values():
+        for term in semesters.values():
+            term['total_units'] = sum(r.course.unit for r in term['results'])
+            term['total_points'] = sum(r.grade_point * r.course.unit for r in term['results'])
+
+    return {
+        'results_by_session': results_by_session,
+        'current_cgpa': current_cgpa,
+        'total_courses': total_courses,
+        'total_units': total_units,
+    }
+
+
+def load_student(sessions, courses_per_term):
+    department = Department.objects.create(name='Benchmark', code='BENCH')
+    student = User.objects.create(username='student', role='student', department=department)
+    courses = Course.objects.bulk_create([
+        Course(title=f'Course {n}', code=f'BEN{n:04d}', unit=(n % 4) + 1, department=department)
+        for n in range(sessions * 2 * courses_per_term)
+    ])
+    rng = random.Random(42)
+    course_iter = iter(courses)
+    for year in range(2000, 2000 + sessions):
+        for semester in ('1', '2'):
+            for _ in range(courses_per_term):
+                Result.objects.create(
+                    student=student, course=next(course_iter), session=f'{year}/{year + 1}',
+                    semester=semester, score=rng.randint(0, 100),
+                )
+    return student
+
+
+def summarize(record):
+    return (
+        record['current_cgpa'], record['total_courses'], record['total_units'],
+        [
+            (session, semester, len(term['results']), term['gpa'], term['cgpa'],
+             term['total_units'], round(term['total_points'], 6))
+            for session, semesters in sorted(record['results_by_session'].items())
+            for semester, term in sorted(semesters.items())
+        ],
+    )
+
+
+def measure(build, student, repeat):
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        record = build(student)
+    query_count = len(queries.captured_queries)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        build(student)
+        # Keep the debug query log from filling up
+        reset_queries()
+    return record, (time.perf_counter() - started) / repeat, query_count
+
+
+def run_benchmark(sessions, courses_per_term, repeat):
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        student = load_student(sessions, courses_per_term)
+        print(f'Student with {sessions} sessions, {Result.objects.count()} results on {connection.vendor}.')
+
+        legacy, legacy_time, legacy_queries = measure(legacy_record, student, repeat)
+        single, single_time, single_queries = measure(student_record, student, repeat)
+        assert summarize(legacy) == summarize(single), 'dashboard builds disagree'
+
+        print(f"{'build':>16} {'ms':>9} {'queries':>8}")
+        print(f"{'per-term loop':>16} {legacy_time * 1000:>9.2f} {legacy_queries:>8}")
+        print(f"{'single pass':>16} {single_time * 1000:>9.2f} {single_queries:>8}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8, help='Sessions of results for the student')
+    parser.add_argument('--courses-per-term', type=int, default=6, help='Results per semester')
+    parser.add_argument('--repeat', type=int, default=200, help='Builds timed per method')
+    args = parser.parse_args()
+    run_benchmark(args.sessions, args.courses_per_term, args.repeat)
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'accounts',
     'results',
     'feedback',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -96,6 +97,48 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Uploaded files (CSV uploads waiting for the job worker)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Cache shared by the web and job worker processes, so dashboard invalidations
+# made by either are seen by both. With REDIS_URL set it is Redis, whose atomic
+# INCR keeps the dashboard hit/miss counters exact under concurrent requests.
+# Otherwise it is the database (run manage.py createcachetable once), sized
+# for a cached dashboard per active user; its counters may miss a few
+# concurrent increments.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 100_000,
+                # Cull a tenth of the entries when full, rather than a third
+                'CULL_FREQUENCY': 10,
+            },
+        }
+    }
+
+# Sentiment engine for feedback comments: 'keyword', or 'naive_bayes' once a
+# model has been trained into SENTIMENT_MODEL_PATH with manage.py train_sentiment
+SENTIMENT_ENGINE = 'keyword'
+SENTIMENT_MODEL_PATH = BASE_DIR / 'sentiment_model.npz'
+
+# Rendered transcript PDFs, least recently downloaded evicted beyond the cap
+TRANSCRIPT_CACHE_DIR = BASE_DIR / 'transcript_cache'
+TRANSCRIPT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Processes the job worker renders a department's transcripts ZIP with
+TRANSCRIPT_WORKERS = 2
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
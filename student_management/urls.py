@@ -10,4 +10,5 @@ urlpatterns = [
     path('', include('accounts.urls')),
     path('results/', include('results.urls')),
     path('feedback/', include('feedback.urls')),
+    path('jobs/', include('jobs.urls')),
 ]